@@ -13,4 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .extension import *
+try:
+    import omni.ext
+except ImportError:
+    # Outside Kit, for the headless batch generator, only the modules without Kit dependencies are usable
+    pass
+else:
+    from .extension import *
@@ -0,0 +1,171 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+from pxr import Sdf
+from .stage_registry import PerStageRegistry
+
+# Marks a layer as holding the generated items of the area at this path
+AREA_KEY = "airoomgenerator:area"
+
+class AreaLayers:
+    # The generated items of each area are authored into a layer of its own, attached as a sublayer of the root
+    # layer. Every generation starts a new candidate layer from the active one and only the active candidate is
+    # attached, so switching between results, discarding one or unloading an area is a single sublayer edit.
+    # Candidates are anonymous layers, or files next to the stage once it has been saved.
+    def __init__(self, stage, max_candidates: int = 5) -> None:
+        self.stage = stage
+        self.max_candidates = max(1, max_candidates)
+        self._candidates = {}
+        self._active = {}
+
+    def _find_attached(self, area_path: str):
+        # (index in the root layer's sublayers, layer) of the area's attached layer, (-1, None) when there is none
+        root = self.stage.GetRootLayer()
+        for index, path in enumerate(root.subLayerPaths):
+            layer = Sdf.Layer.FindRelativeToLayer(root, path)
+            if layer is not None and layer.customLayerData.get(AREA_KEY, None) == area_path:
+                return index, layer
+        return -1, None
+
+    def _get_candidates(self, area_path: str) -> list:
+        if area_path not in self._candidates:
+            # A stage saved with a generated area comes back with its active layer attached
+            _, layer = self._find_attached(area_path)
+            self._candidates[area_path] = [layer] if layer is not None else []
+            self._active[area_path] = 0 if layer is not None else -1
+        return self._candidates[area_path]
+
+    def get_active_layer(self, area_path: str):
+        candidates = self._get_candidates(area_path)
+        index = self._active[area_path]
+        return candidates[index] if index >= 0 else None
+
+    def _attach(self, area_path: str, layer) -> None:
+        # Puts layer in the place of the area's attached layer, or detaches the area's layer when layer is None
+        root = self.stage.GetRootLayer()
+        index, _ = self._find_attached(area_path)
+        if index >= 0:
+            del root.subLayerPaths[index]
+        if layer is not None:
+            root.subLayerPaths.insert(max(index, 0), self._get_sublayer_path(layer))
+
+    def _get_sublayer_path(self, layer) -> str:
+        root = self.stage.GetRootLayer()
+        if layer.anonymous or root.anonymous:
+            return layer.identifier
+        return "./" + os.path.relpath(layer.realPath, os.path.dirname(root.realPath)).replace(os.sep, "/")
+
+    def _create_layer(self, area_path: str, candidates: list):
+        name = area_path.rstrip("/").split("/")[-1]
+        root = self.stage.GetRootLayer()
+        if root.anonymous:
+            return Sdf.Layer.CreateAnonymous(name + ".usda")
+        # Files are reused by slot, so an area never has more than max_candidates of them
+        directory, file_name = os.path.split(root.realPath)
+        used = {candidate.realPath for candidate in candidates}
+        for slot in range(self.max_candidates + 1):
+            path = os.path.join(directory, f"{os.path.splitext(file_name)[0]}_{name}_{slot}.usda")
+            if path not in used:
+                break
+        layer = Sdf.Layer.FindOrOpen(path) if os.path.exists(path) else None
+        if layer is None:
+            layer = Sdf.Layer.CreateNew(path)
+        return layer
+
+    def export_anonymous(self) -> None:
+        # A new stage has an anonymous root, so its candidates are anonymous layers that are not written with it.
+        # Once the stage has a file they are exported next to it and the attached ones are attached again, so the
+        # root's sublayer paths point at the files. Called after the stage has been saved.
+        root = self.stage.GetRootLayer()
+        if root.anonymous:
+            return
+        # A stage that was reopened by Save As still has the anonymous layers attached
+        area_paths = set(self._candidates)
+        for path in root.subLayerPaths:
+            layer = Sdf.Layer.FindRelativeToLayer(root, path)
+            if layer is not None and layer.anonymous and AREA_KEY in layer.customLayerData:
+                area_paths.add(layer.customLayerData[AREA_KEY])
+        for area_path in area_paths:
+            candidates = self._get_candidates(area_path)
+            for index, candidate in enumerate(candidates):
+                if candidate.anonymous:
+                    layer = self._create_layer(area_path, candidates)
+                    layer.TransferContent(candidate)
+                    layer.Save()
+                    candidates[index] = layer
+            active = self.get_active_layer(area_path)
+            if active is not None:
+                self._attach(area_path, active)
+        if root.dirty:
+            root.Save()
+
+    def new_candidate(self, area_path: str):
+        # Adds a copy of the active candidate and makes it the active one, returns it.
+        # The oldest candidates that are not active are dropped to stay within max_candidates.
+        candidates = self._get_candidates(area_path)
+        active = self.get_active_layer(area_path)
+        while len(candidates) >= self.max_candidates:
+            drop = 1 if candidates[0] is active and len(candidates) > 1 else 0
+            del candidates[drop]
+
+        layer = self._create_layer(area_path, candidates)
+        if active is not None:
+            layer.TransferContent(active)
+        else:
+            layer.Clear()
+        layer.customLayerData = {AREA_KEY: area_path}
+        candidates.append(layer)
+        self._active[area_path] = len(candidates) - 1
+        self._attach(area_path, layer)
+        return layer
+
+    def select(self, area_path: str, offset: int) -> None:
+        # Makes the candidate offset places away the active one, wrapping around
+        candidates = self._get_candidates(area_path)
+        if len(candidates) == 0:
+            return
+        index = (self._active[area_path] + offset) % len(candidates)
+        self._active[area_path] = index
+        self._attach(area_path, candidates[index])
+
+    def discard(self, area_path: str) -> None:
+        # Drops the active candidate, the one before it becomes active
+        candidates = self._get_candidates(area_path)
+        index = self._active[area_path]
+        if index < 0:
+            return
+        del candidates[index]
+        if index > 0:
+            index -= 1
+        elif len(candidates) == 0:
+            index = -1
+        self._active[area_path] = index
+        self._attach(area_path, candidates[index] if index >= 0 else None)
+
+    def describe(self, area_path: str) -> str:
+        candidates = self._get_candidates(area_path)
+        if len(candidates) == 0:
+            return "No results"
+        return f"Result {self._active[area_path] + 1} of {len(candidates)}"
+
+_area_layers = PerStageRegistry(AreaLayers)
+
+def get_area_layers(stage, max_candidates: int = 5) -> AreaLayers:
+    return _area_layers.get(stage, max_candidates)
+
+def release_area_layers() -> None:
+    _area_layers.release()
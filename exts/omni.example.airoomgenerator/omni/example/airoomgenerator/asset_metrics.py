@@ -0,0 +1,47 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import carb
+from .cache import PersistentLRUCache, make_cache_key, open_extension_cache
+from .bbox_service import get_bbox_service
+from .authoring import measure_asset_prim
+
+_metrics_cache = None
+
+def get_metrics_cache() -> PersistentLRUCache:
+    global _metrics_cache
+    if _metrics_cache is None:
+        _metrics_cache = open_extension_cache("asset_metrics")
+    return _metrics_cache
+
+def save_metrics_cache():
+    if _metrics_cache is not None:
+        _metrics_cache.save()
+
+def get_asset_metrics(uri: str):
+    # Native extents and units of the asset at uri, None until it has been measured once
+    metrics = get_metrics_cache().get(make_cache_key("asset_metrics", uri), None)
+    if metrics is None or metrics["min"] == metrics["max"]:
+        # Empty extents were stored for assets that had not loaded yet
+        return None
+    return metrics
+
+def measure_asset(uri: str, prim) -> dict:
+    # Measures the asset prim references and caches the result, None while the asset is not composed
+    # or failed to load, so it is measured again next time instead of caching an empty extent
+    metrics = measure_asset_prim(prim, uri, get_bbox_service(prim.GetStage()).get_cache(prim_paths=[prim.GetPath()]))
+    if metrics is not None:
+        get_metrics_cache().put(make_cache_key("asset_metrics", uri), metrics)
+    return metrics
@@ -0,0 +1,248 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import numpy as np
+from pxr import Gf, Sdf, Tf, UsdGeom, Vt
+from .cache import make_cache_key
+
+# Sdf level authoring of the generated items. Unlike the Usd API these calls are safe inside an
+# Sdf.ChangeBlock, so a whole generation is written with one recomposition and one change notice.
+
+XFORM_OP_ORDER = ["xformOp:translate", "xformOp:rotateXYZ", "xformOp:scale"]
+ASSET_ROTATION = Gf.Vec3d(0, -90, -90)
+GREYBOX_INSTANCER = "Greyboxes"
+GREYBOX_EXTENT = [(-50.0, -50.0, -50.0), (50.0, 50.0, 50.0)]
+ITEM_KEY = "genai:item_key"
+# Assets that do not declare their units and whose largest side is below this many stage units
+# were authored in meters and are scaled up
+_SMALL_ASSET_SIZE = 10
+_SMALL_ASSET_SCALE = 100
+
+def get_item_name(name: str) -> str:
+    return name.replace(" ", "_")
+
+def define_ancestors(stage, layer, prim_path: str) -> None:
+    # Sdf.CreatePrimInLayer adds "over" specs for missing parents, define them like Usd.Stage.DefinePrim does.
+    # Reads the composed stage, so call it before opening the change block.
+    for prefix in Sdf.Path(prim_path.rstrip("/")).GetPrefixes():
+        prim = stage.GetPrimAtPath(prefix)
+        if not prim.IsValid() or not prim.IsDefined():
+            spec = Sdf.CreatePrimInLayer(layer, prefix)
+            spec.specifier = Sdf.SpecifierDef
+
+def set_attribute(prim_spec, name: str, type_name, value, variability=Sdf.VariabilityVarying, custom: bool = False):
+    if name in prim_spec.attributes:
+        attr = prim_spec.attributes[name]
+    else:
+        attr = Sdf.AttributeSpec(prim_spec, name, type_name, variability, custom)
+    attr.default = value
+    return attr
+
+def author_xform(layer, prim_path: str, type_name: str = "Xform", translate: Gf.Vec3d = Gf.Vec3d(0,0,0),
+                 rotate: Gf.Vec3d = Gf.Vec3d(0,0,0), scale: Gf.Vec3d = Gf.Vec3d(1,1,1)):
+    # Same prim and ops as utils.create_prim followed by utils.set_transformTRS_attrs
+    spec = Sdf.CreatePrimInLayer(layer, prim_path)
+    spec.specifier = Sdf.SpecifierDef
+    spec.typeName = type_name
+    set_attribute(spec, "xformOp:translate", Sdf.ValueTypeNames.Double3, Gf.Vec3d(translate))
+    set_attribute(spec, "xformOp:rotateXYZ", Sdf.ValueTypeNames.Float3, Gf.Vec3f(rotate))
+    set_attribute(spec, "xformOp:scale", Sdf.ValueTypeNames.Float3, Gf.Vec3f(scale))
+    set_attribute(spec, "xformOpOrder", Sdf.ValueTypeNames.TokenArray, XFORM_OP_ORDER, Sdf.VariabilityUniform)
+    return spec
+
+def get_greybox_transform(item):
+    # Greyboxes are 100 unit cubes, scaled to the object size and shifted so the bottom sits at y=0
+    length = item['Length']/100
+    width = item['Width']/100
+    height = item['Height']/100
+    translate = Gf.Vec3d(item['X'], item['Y']+height*100*.5, item['Z'])
+    return translate, Gf.Vec3d(length, height, width)
+
+def author_greybox(layer, item, root_prim_path: str) -> str:
+    # Returns the path of the cube, the prim materials are bound to
+    prim_parent_path = root_prim_path + get_item_name(item['object_name'])
+    prim_path = prim_parent_path + "/" + get_item_name(item['object_name'])
+    translate, scale = get_greybox_transform(item)
+
+    author_xform(layer, prim_parent_path)
+    cube = author_xform(layer, prim_path, "Cube", translate=translate, scale=scale)
+    _set_cube_size(cube)
+    set_attribute(cube, "object_name", Sdf.ValueTypeNames.String, item['object_name'], custom=True)
+    return prim_path
+
+def get_asset_path(item_path: str) -> str:
+    # Deep search returns paths on the ov-simready server, the local asset index returns full paths
+    if "://" in item_path or os.path.isabs(item_path):
+        return item_path
+    return "omniverse://ov-simready" + item_path
+
+def measure_asset_prim(prim, asset_path: str, bbox_cache):
+    # Native extents ("min", "max") and "meters_per_unit" of the asset prim references, None while the
+    # asset is not composed. prim has no transform of its own, so its untransformed bound is the asset's extent.
+    box = bbox_cache.ComputeUntransformedBound(prim).ComputeAlignedRange()
+    if box.IsEmpty():
+        return None
+    metrics = {"min": list(box.GetMin()), "max": list(box.GetMax()), "meters_per_unit": None}
+    # The asset's layer is already open once the reference is composed, Find does not load it
+    layer = Sdf.Layer.Find(asset_path)
+    if layer is not None and layer.pseudoRoot.HasInfo(UsdGeom.Tokens.metersPerUnit):
+        metrics["meters_per_unit"] = layer.pseudoRoot.GetInfo(UsdGeom.Tokens.metersPerUnit)
+    return metrics
+
+def get_scale_for_metrics(metrics: dict, meters_per_unit: float = 0.01) -> float:
+    # Scale that brings the asset to the units of a stage with meters_per_unit. Composition does not
+    # convert units, so assets that declare theirs are converted here.
+    if metrics.get("meters_per_unit"):
+        return metrics["meters_per_unit"] / meters_per_unit
+    largest_dimension = max(high - low for low, high in zip(metrics["min"], metrics["max"]))
+    if largest_dimension < _SMALL_ASSET_SIZE:
+        return _SMALL_ASSET_SCALE
+    return 1.0
+
+def author_asset(layer, item, item_name: str, asset_path: str, root_prim_path: str, scale: float = 1.0):
+    # Returns (parent path, path of the prim referencing the asset)
+    prim_parent_path = root_prim_path + get_item_name(item_name)
+    prim_path = prim_parent_path + "/" + get_item_name(item_name)
+
+    author_xform(layer, prim_parent_path, translate=Gf.Vec3d(item['X'], item['Y'], item['Z']),
+                 rotate=ASSET_ROTATION, scale=Gf.Vec3d(scale, scale, scale))
+    # Like utils.create_prim the ops get no values, so the transform of the asset's root still applies
+    spec = Sdf.CreatePrimInLayer(layer, prim_path)
+    spec.specifier = Sdf.SpecifierDef
+    spec.typeName = "Xform"
+    set_attribute(spec, "xformOpOrder", Sdf.ValueTypeNames.TokenArray, XFORM_OP_ORDER, Sdf.VariabilityUniform)
+    spec.referenceList.Prepend(Sdf.Reference(asset_path))
+    # Add reference for future search refinement
+    set_attribute(spec, "DeepSearch:Query", Sdf.ValueTypeNames.String, item_name, custom=True)
+    return prim_parent_path, prim_path
+
+def _set_cube_size(cube) -> None:
+    set_attribute(cube, "extent", Sdf.ValueTypeNames.Float3Array, Vt.Vec3fArray(GREYBOX_EXTENT))
+    set_attribute(cube, "size", Sdf.ValueTypeNames.Double, 100.0)
+
+def _get_array(prim_spec, name: str, dtype, width: int = 1) -> np.ndarray:
+    # Authored array value as an (n, width) array, empty when there is none yet
+    if name not in prim_spec.attributes or prim_spec.attributes[name].default is None:
+        return np.zeros((0, width), dtype=dtype)
+    return np.array(prim_spec.attributes[name].default, dtype=dtype).reshape(-1, width)
+
+def author_greybox_instancer(layer, items, root_prim_path: str) -> list:
+    # Writes the greyboxes as instances of one PointInstancer with a cube prototype per material, so the
+    # prim count grows with the number of materials instead of the number of objects. Instances are added
+    # to the ones already authored, streamed objects arrive one at a time, and replace the instance of the
+    # same object name.
+    # Returns (material, prototype path) for the prototypes that were added.
+    instancer_path = root_prim_path + GREYBOX_INSTANCER
+    instancer = layer.GetPrimAtPath(instancer_path)
+    if instancer is None:
+        instancer = Sdf.CreatePrimInLayer(layer, instancer_path)
+        instancer.specifier = Sdf.SpecifierDef
+        instancer.typeName = "PointInstancer"
+        prototypes_scope = Sdf.CreatePrimInLayer(layer, instancer_path + "/Prototypes")
+        prototypes_scope.specifier = Sdf.SpecifierDef
+        prototypes_scope.typeName = "Scope"
+    if "prototypes" in instancer.relationships:
+        prototypes_rel = instancer.relationships["prototypes"]
+    else:
+        prototypes_rel = Sdf.RelationshipSpec(instancer, "prototypes", False)
+    prototypes = {str(path): index for index, path in enumerate(prototypes_rel.targetPathList.explicitItems)}
+
+    added = []
+    proto_indices = np.empty(len(items), dtype=np.int32)
+    for i, item in enumerate(items):
+        material = item['Material']
+        prototype_path = instancer_path + "/Prototypes/" + Tf.MakeValidIdentifier(material or "Default")
+        if prototype_path not in prototypes:
+            cube = Sdf.CreatePrimInLayer(layer, prototype_path)
+            cube.specifier = Sdf.SpecifierDef
+            cube.typeName = "Cube"
+            _set_cube_size(cube)
+            prototypes[prototype_path] = len(prototypes)
+            added.append((material, prototype_path))
+        proto_indices[i] = prototypes[prototype_path]
+    prototypes_rel.targetPathList.explicitItems = [Sdf.Path(path) for path in prototypes]
+
+    # Same placement as get_greybox_transform, for all items at once
+    data = np.array([[item['X'], item['Y'], item['Z'], item['Length'], item['Width'], item['Height']] for item in items],
+                    dtype=np.float64).reshape(-1, 6)
+    positions = np.column_stack((data[:, 0], data[:, 1] + data[:, 5] * .5, data[:, 2]))
+    scales = data[:, [3, 5, 4]] / 100
+
+    old_positions = _get_array(instancer, "positions", np.float32, 3)
+    old_scales = _get_array(instancer, "scales", np.float32, 3)
+    old_indices = _get_array(instancer, "protoIndices", np.int32)[:, 0]
+    object_names = []
+    if "object_names" in instancer.attributes and instancer.attributes["object_names"].default is not None:
+        object_names = list(instancer.attributes["object_names"].default)
+    if len(object_names) == len(old_positions):
+        # An object that arrives again, like on a retried stream, replaces its instance instead of adding one
+        new_names = {item['object_name'] for item in items}
+        keep = np.array([name not in new_names for name in object_names], dtype=bool)
+        old_positions, old_scales, old_indices = old_positions[keep], old_scales[keep], old_indices[keep]
+        object_names = [name for name, kept in zip(object_names, keep) if kept]
+    positions = np.concatenate((old_positions, positions)).astype(np.float32)
+    scales = np.concatenate((old_scales, scales)).astype(np.float32)
+    proto_indices = np.concatenate((old_indices, proto_indices))
+    object_names.extend(item['object_name'] for item in items)
+
+    set_attribute(instancer, "positions", Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray.FromNumpy(positions))
+    set_attribute(instancer, "scales", Sdf.ValueTypeNames.Float3Array, Vt.Vec3fArray.FromNumpy(scales))
+    set_attribute(instancer, "protoIndices", Sdf.ValueTypeNames.IntArray, Vt.IntArray.FromNumpy(proto_indices))
+    set_attribute(instancer, "object_names", Sdf.ValueTypeNames.StringArray, Vt.StringArray(object_names), custom=True)
+    return added
+
+def get_item_key(item, asset_path: str = None) -> str:
+    # Changes whenever anything the authored item depends on changes, asset_path is None for greyboxes
+    return make_cache_key(item['object_name'], item['Material'], item['X'], item['Y'], item['Z'],
+                          item['Length'], item['Width'], item['Height'], asset_path)
+
+def get_item_keys(stage, root_prim_path: str) -> dict:
+    # Item name to the key it was authored with, "" for items from before keys were recorded
+    root = stage.GetPrimAtPath(root_prim_path.rstrip("/"))
+    if not root.IsValid():
+        return {}
+    keys = {}
+    for child in root.GetChildren():
+        attr = child.GetAttribute(ITEM_KEY)
+        keys[child.GetName()] = (attr.Get() or "") if attr.IsValid() else ""
+    return keys
+
+def set_item_key(layer, prim_path: str, key: str) -> None:
+    set_attribute(layer.GetPrimAtPath(prim_path), ITEM_KEY, Sdf.ValueTypeNames.String, key, custom=True)
+
+def remove_item(layer, prim_path: str) -> None:
+    # Removes the item's spec from layer, opinions from other layers are left alone
+    spec = layer.GetPrimAtPath(prim_path)
+    if spec is not None:
+        del spec.nameParent.nameChildren[spec.name]
+
+def bind_materials(layer, bindings) -> None:
+    # bindings is a list of (prim path, material path). Authors the same opinions as
+    # UsdShade.MaterialBindingAPI.Bind, without going through the Usd API one prim at a time.
+    for prim_path, material_path in bindings:
+        spec = Sdf.CreatePrimInLayer(layer, prim_path)
+        schemas = spec.GetInfo("apiSchemas")
+        if "MaterialBindingAPI" not in schemas.GetAddedOrExplicitItems():
+            if schemas.isExplicit:
+                schemas.explicitItems = list(schemas.explicitItems) + ["MaterialBindingAPI"]
+            else:
+                schemas.prependedItems = list(schemas.prependedItems) + ["MaterialBindingAPI"]
+            spec.SetInfo("apiSchemas", schemas)
+        if "material:binding" in spec.relationships:
+            binding = spec.relationships["material:binding"]
+        else:
+            binding = Sdf.RelationshipSpec(spec, "material:binding", False)
+        binding.targetPathList.explicitItems = [Sdf.Path(material_path)]
@@ -0,0 +1,406 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Headless batch generation, runs the same pipeline as Generate for every area of a manifest and writes
+# one .usda per area with plain pxr, without Kit. From the extension folder:
+#   python -m omni.example.airoomgenerator.batch areas.json --out layouts --workers 4
+# Areas that already have a .usda in the output folder are skipped, so a stopped run resumes where it was.
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import importlib
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pxr import Gf, Sdf, Tf, Usd, UsdGeom
+from .prompts import assistant_input, few_shot_examples, build_area_prompt, build_messages
+from .compact_format import to_compact
+from .response_parser import parse_objects
+from .token_budget import count_message_tokens, fit_to_budget
+from .few_shot import FewShotIndex
+from .retry import RetryableError, RETRYABLE_STATUS, parse_retry_after, call_with_retries
+from .rate_limiter import RequestLimiter
+from .layout import resolve_layout
+from .local_index import LocalAssetIndex
+from .materials import MaterialPresets
+from .area_layers import AREA_KEY
+from .authoring import (define_ancestors, author_xform, author_greybox, author_greybox_instancer, author_asset,
+                        bind_materials, set_attribute, get_item_name, get_asset_path, get_scale_for_metrics,
+                        measure_asset_prim)
+
+CHATGPT_URL = "https://api.openai.com/v1/chat/completions"
+LAYOUT_PATH = "/World/Layout/"
+LOOKS_PATH = "/World/Looks/"
+FLOOR_MATERIAL = "Concrete_Rough_Dirty"
+# Counted with the prompt against the tokens per minute quota, like rate_limit/expected_completion_tokens in Kit
+EXPECTED_COMPLETION_TOKENS = 1000
+
+_worker_loop = None
+_worker_limiter = None
+_worker_session = None
+
+def get_worker_limiter(options) -> RequestLimiter:
+    # Each worker process gets its share of the quotas, kept across the areas it generates
+    global _worker_limiter
+    if _worker_limiter is None:
+        workers = max(1, options.workers)
+        _worker_limiter = RequestLimiter(
+            max_concurrency=1,
+            requests_per_minute=options.requests_per_minute / workers,
+            tokens_per_minute=options.tokens_per_minute / workers)
+    return _worker_limiter
+
+def get_worker_session():
+    # Each worker process keeps one connection pool across the areas it generates, so the TLS
+    # handshake is paid once per worker. Closed by _close_worker when the worker exits.
+    global _worker_session
+    import aiohttp
+    if _worker_session is None or _worker_session.closed:
+        _worker_session = aiohttp.ClientSession()
+    return _worker_session
+
+# LLM backends answer complete(messages, compact) with the response text, search backends answer
+# find(queries) with one (query, path) or None per query. Both are built from the parsed arguments, so
+# "package.module:Class" on the command line plugs in any class with that constructor.
+
+class OpenAIBackend:
+    def __init__(self, options) -> None:
+        self.api_key = options.api_key
+        if not self.api_key:
+            raise ValueError("The openai backend needs --api-key or OPENAI_API_KEY")
+        self.model = options.model
+        self.max_retries = options.max_retries
+        self.timeout = options.timeout
+        self._limiter = get_worker_limiter(options)
+
+    async def complete(self, messages: list, compact: bool) -> str:
+        import aiohttp
+        session = get_worker_session()
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {"Authorization": "Bearer %s" % self.api_key}
+        parameters = {"model": self.model, "messages": messages}
+        tokens = count_message_tokens(messages, self.model) + EXPECTED_COMPLETION_TOKENS
+
+        async def attempt():
+            try:
+                async with self._limiter.limit(tokens):
+                    async with session.post(CHATGPT_URL, headers=headers, json=parameters, timeout=timeout) as r:
+                        if r.status != 200:
+                            message = await r.text()
+                            if r.status in RETRYABLE_STATUS:
+                                raise RetryableError(f"ChatGPT {r.status}: {message}",
+                                                     parse_retry_after(r.headers.get("Retry-After", None)))
+                            raise RuntimeError(f"ChatGPT {r.status}: {message}")
+                        response = await r.json()
+                return response["choices"][0]["message"]['content']
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                raise RetryableError(str(e) or type(e).__name__)
+
+        return await call_with_retries(attempt, max_retries=self.max_retries)
+
+    async def close(self) -> None:
+        # The session is the worker's, it outlives the backend
+        pass
+
+class ExampleBackend:
+    # The answer Generate gives without ChatGPT, for trying a manifest without an API key
+    def __init__(self, options) -> None:
+        pass
+
+    async def complete(self, messages: list, compact: bool) -> str:
+        return to_compact(assistant_input) if compact else assistant_input
+
+    async def close(self) -> None:
+        pass
+
+class NoSearch:
+    # Every object becomes a greybox
+    def __init__(self, options) -> None:
+        pass
+
+    async def find(self, queries: list) -> list:
+        return [None for _ in queries]
+
+    async def close(self) -> None:
+        pass
+
+# Each worker process loads the local index once, the main process refreshes it before the workers start
+_local_indexes = {}
+
+def get_local_index_path(options) -> str:
+    return os.path.join(options.out, ".local_index.json")
+
+class LocalSearch:
+    def __init__(self, options) -> None:
+        if not options.asset_dir:
+            raise ValueError("The local search backend needs --asset-dir")
+        key = (options.asset_dir, get_local_index_path(options))
+        if key not in _local_indexes:
+            _local_indexes[key] = LocalAssetIndex(*key)
+        self.index = _local_indexes[key]
+
+    async def find(self, queries: list) -> list:
+        return [self.index.query_first(query) for query in queries]
+
+    async def close(self) -> None:
+        pass
+
+LLM_BACKENDS = {"openai": OpenAIBackend, "example": ExampleBackend}
+SEARCH_BACKENDS = {"none": NoSearch, "local": LocalSearch}
+
+def load_backend(spec: str, builtins: dict, options):
+    if spec in builtins:
+        return builtins[spec](options)
+    if ":" not in spec:
+        raise ValueError(f"Unknown backend {spec}, use one of {', '.join(builtins)} or package.module:Class")
+    module_name, attr = spec.split(":", 1)
+    return getattr(importlib.import_module(module_name), attr)(options)
+
+def load_manifest(path: str) -> list:
+    # A JSON list of areas, or {"areas": [...]}. Each area has a name, its length and width in cm
+    # (or "size": [length, width]) and the prompt.
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data["areas"]
+    areas = []
+    names = set()
+    for entry in data:
+        if "size" in entry:
+            length, width = entry["size"]
+        else:
+            length, width = entry["length"], entry["width"]
+        area = {"name": entry["name"], "length": float(length), "width": float(width),
+                "prompt": entry.get("prompt", "")}
+        file_name = get_area_file_name(area["name"])
+        if file_name in names:
+            raise ValueError(f"Two areas of {path} are written to {file_name}")
+        names.add(file_name)
+        areas.append(area)
+    return areas
+
+def get_area_file_name(area_name: str) -> str:
+    return Tf.MakeValidIdentifier(get_item_name(area_name)) + ".usda"
+
+def get_area_output_path(options, area: dict) -> str:
+    return os.path.join(options.out, get_area_file_name(area["name"]))
+
+def _author_material(layer, material_name: str) -> str:
+    # The prims CreateMdlMaterialPrimCommand makes for a preset
+    looks = Sdf.CreatePrimInLayer(layer, LOOKS_PATH[:-1])
+    looks.specifier = Sdf.SpecifierDef
+    looks.typeName = "Scope"
+    material_path = LOOKS_PATH + material_name
+    material = Sdf.CreatePrimInLayer(layer, material_path)
+    material.specifier = Sdf.SpecifierDef
+    material.typeName = "Material"
+    shader = Sdf.CreatePrimInLayer(layer, material_path + "/Shader")
+    shader.specifier = Sdf.SpecifierDef
+    shader.typeName = "Shader"
+    set_attribute(shader, "info:implementationSource", Sdf.ValueTypeNames.Token, "sourceAsset", Sdf.VariabilityUniform)
+    set_attribute(shader, "info:mdl:sourceAsset", Sdf.ValueTypeNames.Asset,
+                  Sdf.AssetPath(MaterialPresets[material_name]), Sdf.VariabilityUniform)
+    set_attribute(shader, "info:mdl:sourceAsset:subIdentifier", Sdf.ValueTypeNames.Token, material_name,
+                  Sdf.VariabilityUniform)
+    Sdf.AttributeSpec(shader, "outputs:out", Sdf.ValueTypeNames.Token)
+    surface = Sdf.AttributeSpec(material, "outputs:mdl:surface", Sdf.ValueTypeNames.Token)
+    surface.connectionPathList.explicitItems = [Sdf.Path(material_path + "/Shader.outputs:out")]
+    return material_path
+
+def write_area_file(path: str, area: dict, objects: list, query_result: list, use_instancer: bool = False) -> None:
+    # The prims Add Area and Generate make in Kit: the area with its floor, the items below <area>/items and
+    # the preset materials under /World/Looks. The layer is tagged like an area layer, so it can also be
+    # added to a stage as a sublayer.
+    area_path = LAYOUT_PATH + Tf.MakeValidIdentifier(get_item_name(area["name"]))
+    root_prim_path = area_path + "/items/"
+    layer = Sdf.Layer.CreateAnonymous(".usda")
+    stage = Usd.Stage.Open(layer)
+    UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.y)
+    UsdGeom.SetStageMetersPerUnit(stage, 0.01)
+    stage.SetDefaultPrim(stage.DefinePrim("/World", "Xform"))
+    define_ancestors(stage, layer, root_prim_path)
+
+    placed = [(FLOOR_MATERIAL, area_path)]
+    assets = []
+    greyboxes = []
+    with Sdf.ChangeBlock():
+        area_spec = author_xform(layer, area_path)
+        set_attribute(area_spec, "genai:prompt", Sdf.ValueTypeNames.String, area["prompt"], custom=True)
+        author_xform(layer, area_path + "/Floor", scale=Gf.Vec3d(area["length"], 1, area["width"]))
+        # A 100 unit Cube in place of the cube mesh Kit creates
+        floor = author_xform(layer, area_path + "/Floor/Cube", "Cube", scale=Gf.Vec3d(0.01, 0.01, 0.01))
+        set_attribute(floor, "size", Sdf.ValueTypeNames.Double, 100.0)
+        set_attribute(floor, "primvar:area_name", Sdf.ValueTypeNames.String, area["name"], custom=True)
+        for item, result in zip(objects, query_result):
+            if result is None:
+                greyboxes.append(item)
+                continue
+            asset_path = get_asset_path(result[1])
+            assets.append((asset_path, *author_asset(layer, item, item['object_name'], asset_path, root_prim_path)))
+        if use_instancer and len(greyboxes) > 0:
+            placed.extend(author_greybox_instancer(layer, greyboxes, root_prim_path))
+        else:
+            placed.extend((item['Material'], author_greybox(layer, item, root_prim_path)) for item in greyboxes)
+        placed = [(material, prim_path) for material, prim_path in placed if material in MaterialPresets]
+        materials = {material: _author_material(layer, material) for material in {material for material, _ in placed}}
+        bind_materials(layer, [(prim_path, materials[material]) for material, prim_path in placed])
+
+    # Assets are scaled like in Kit, from their extents once they are composed
+    bbox_cache = UsdGeom.BBoxCache(Usd.TimeCode.Default(), [UsdGeom.Tokens.default_])
+    for asset_path, prim_parent_path, prim_path in assets:
+        metrics = measure_asset_prim(stage.GetPrimAtPath(prim_path), asset_path, bbox_cache)
+        if metrics is None:
+            continue
+        scale = get_scale_for_metrics(metrics, UsdGeom.GetStageMetersPerUnit(stage))
+        if scale != 1.0:
+            stage.GetPrimAtPath(prim_parent_path).GetAttribute('xformOp:scale').Set(Gf.Vec3f(scale, scale, scale))
+
+    layer.customLayerData = {AREA_KEY: area_path, "prompt": area["prompt"]}
+    # Only finished areas get their final name, a partial file is rewritten on the next run
+    partial_path = path[:-len(".usda")] + ".partial.usda"
+    layer.Export(partial_path)
+    os.replace(partial_path, path)
+
+async def generate_area(area: dict, options, llm, search) -> dict:
+    start = time.monotonic()
+    example = None
+    if options.select_example:
+        example = FewShotIndex(few_shot_examples).select(area["name"].replace("_", " "), area["length"], area["width"])
+    prompt = " ".join(build_area_prompt(area["name"], "%g" % area["length"], "%g" % area["width"], area["prompt"]).split())
+    messages = build_messages(prompt, example, options.compact)
+    messages, _ = fit_to_budget(messages, options.max_prompt_tokens, options.model)
+
+    text = await llm.complete(messages, options.compact)
+    objects, complete = parse_objects(text, options.compact)
+    if objects is None:
+        raise RuntimeError("No objects could be read from the response")
+    if options.layout_max_iterations > 0:
+        objects = resolve_layout(objects, area["length"], area["width"], options.layout_max_iterations, options.layout_gap)
+
+    query_result = await search.find([item['object_name'] for item in objects])
+    write_area_file(get_area_output_path(options, area), area, objects, query_result, options.use_instancer)
+    return {"objects": len(objects), "assets": sum(1 for result in query_result if result is not None),
+            "complete": complete, "seconds": time.monotonic() - start}
+
+async def _generate_area_with_backends(area: dict, options) -> dict:
+    llm = load_backend(options.llm, LLM_BACKENDS, options)
+    search = load_backend(options.search, SEARCH_BACKENDS, options)
+    try:
+        return await generate_area(area, options, llm, search)
+    finally:
+        await llm.close()
+        await search.close()
+
+def _get_worker_loop():
+    # The areas of a worker share one event loop, like the worker's limiter
+    global _worker_loop
+    if _worker_loop is None:
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop
+
+def _init_worker():
+    # Worker processes leave through os._exit, so atexit handlers would never run
+    multiprocessing.util.Finalize(None, _close_worker, exitpriority=10)
+
+def _close_worker():
+    global _worker_loop, _worker_session
+    if _worker_loop is None:
+        return
+    if _worker_session is not None and not _worker_session.closed:
+        _worker_loop.run_until_complete(_worker_session.close())
+    _worker_session = None
+    _worker_loop.close()
+    _worker_loop = None
+
+def run_area(area: dict, options) -> dict:
+    # Runs in a worker process, backends live for one area, the event loop, limiter and HTTP session
+    # for the whole worker
+    try:
+        return _get_worker_loop().run_until_complete(_generate_area_with_backends(area, options))
+    except Exception as e:
+        # Exceptions raised by pxr can not be sent back to the main process
+        raise RuntimeError(str(e) or type(e).__name__) from None
+
+def run_batch(options) -> int:
+    # Returns the number of failed areas
+    areas = load_manifest(options.manifest)
+    os.makedirs(options.out, exist_ok=True)
+    todo = [area for area in areas if options.force or not os.path.isfile(get_area_output_path(options, area))]
+    print(f"{len(areas) - len(todo)} of {len(areas)} areas already generated, {len(todo)} to go", flush=True)
+    if len(todo) == 0:
+        return 0
+    if options.search == "local":
+        added, updated, removed = LocalAssetIndex(options.asset_dir, get_local_index_path(options)).refresh()
+        print(f"Local asset index: {added} added, {updated} updated, {removed} removed", flush=True)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=options.workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(run_area, area, options): area for area in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            area = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(todo)}] {area['name']} failed: {e}", file=sys.stderr, flush=True)
+                continue
+            recovered = "" if result["complete"] else ", response recovered"
+            print(f"[{done}/{len(todo)}] {area['name']}: {result['objects']} objects, {result['assets']} assets, "
+                  f"{result['seconds']:.1f} s{recovered}", flush=True)
+    print(f"{len(todo) - failed} areas generated, {failed} failed", flush=True)
+    return failed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m omni.example.airoomgenerator.batch",
+                                     description="Generate a room layout .usda for every area of a manifest.")
+    parser.add_argument("manifest", help="JSON list of areas with name, length, width and prompt")
+    parser.add_argument("--out", default="layouts", help="folder the .usda files are written to")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="number of worker processes")
+    parser.add_argument("--force", action="store_true", help="regenerate areas that already have a .usda")
+    parser.add_argument("--llm", default="openai", help="openai, example or package.module:Class")
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY", ""),
+                        help="defaults to the OPENAI_API_KEY environment variable")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds per ChatGPT request")
+    parser.add_argument("--requests-per-minute", type=float, default=500.0,
+                        help="ChatGPT requests per minute of the whole run, split between the workers, 0 disables it")
+    parser.add_argument("--tokens-per-minute", type=float, default=90000.0,
+                        help="ChatGPT tokens per minute of the whole run, split between the workers, 0 disables it")
+    parser.add_argument("--compact", action="store_true", help="ask for the compact output format")
+    parser.add_argument("--no-select-example", dest="select_example", action="store_false",
+                        help="always send the warehouse example")
+    parser.add_argument("--max-prompt-tokens", type=int, default=3000,
+                        help="prompts over this are sent without an example, 0 disables the check")
+    parser.add_argument("--search", default="none", help="none, local or package.module:Class")
+    parser.add_argument("--asset-dir", default="", help="folder of USD assets for the local search")
+    parser.add_argument("--use-instancer", action="store_true", help="write greyboxes as one PointInstancer")
+    parser.add_argument("--layout-max-iterations", type=int, default=256,
+                        help="passes stop once nothing overlaps, 0 keeps overlapping objects")
+    parser.add_argument("--layout-gap", type=float, default=0.0)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    options = parse_args(argv)
+    options.out = os.path.abspath(options.out)
+    if options.asset_dir:
+        options.asset_dir = os.path.abspath(options.asset_dir)
+    return 1 if run_batch(options) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
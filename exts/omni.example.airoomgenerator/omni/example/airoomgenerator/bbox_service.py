@@ -0,0 +1,93 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import numpy as np
+from pxr import Sdf, Tf, Usd, UsdGeom
+from .stage_registry import PerStageRegistry
+
+class BBoxService:
+    # World space bounds from one UsdGeom.BBoxCache per time code, reused across queries until a change notice
+    # from the stage touches one of the queried prims, their ancestors or their descendants.
+    def __init__(self, stage, purposes=(UsdGeom.Tokens.default_, UsdGeom.Tokens.render)) -> None:
+        self.stage = stage
+        self._purposes = list(purposes)
+        self._caches = {}
+        self._queried_paths = set()
+        self._listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_objects_changed, stage)
+
+    def revoke(self) -> None:
+        if self._listener is not None:
+            self._listener.Revoke()
+            self._listener = None
+
+    def _affects_queried_prims(self, changed_paths) -> bool:
+        for changed_path in changed_paths:
+            prim_path = changed_path.GetPrimPath()
+            for queried_path in self._queried_paths:
+                if queried_path.HasPrefix(prim_path) or prim_path.HasPrefix(queried_path):
+                    return True
+        return False
+
+    def _on_objects_changed(self, notice, sender) -> None:
+        # BBoxCache can only be cleared as a whole, so it is kept when every change is outside the queried prims,
+        # like the items being placed in another area
+        if not self._queried_paths:
+            return
+        if not (self._affects_queried_prims(notice.GetResyncedPaths())
+                or self._affects_queried_prims(notice.GetChangedInfoOnlyPaths())):
+            return
+        for cache in self._caches.values():
+            cache.Clear()
+        self._queried_paths.clear()
+
+    def get_cache(self, time: Usd.TimeCode = Usd.TimeCode.Default(), prim_paths=()) -> UsdGeom.BBoxCache:
+        # prim_paths are the prims the caller computes bounds for, their changes clear the cache
+        self._queried_paths.update(Sdf.Path(str(prim_path)) for prim_path in prim_paths)
+        # The default time code is NaN, which cannot be a dictionary key
+        key = None if time.IsDefault() else time.GetValue()
+        cache = self._caches.get(key, None)
+        if cache is None:
+            cache = UsdGeom.BBoxCache(time, self._purposes)
+            self._caches[key] = cache
+        return cache
+
+    def compute_world_bounds(self, prim_paths, time: Usd.TimeCode = Usd.TimeCode.Default()):
+        # Returns (mins, maxs) as (n, 3) arrays, rows are NaN for invalid prims and empty bounds
+        cache = self.get_cache(time, prim_paths)
+        mins = np.full((len(prim_paths), 3), np.nan)
+        maxs = np.full((len(prim_paths), 3), np.nan)
+        for i, prim_path in enumerate(prim_paths):
+            prim = self.stage.GetPrimAtPath(prim_path)
+            if not prim.IsValid():
+                continue
+            box = cache.ComputeWorldBound(prim).ComputeAlignedRange()
+            if box.IsEmpty():
+                continue
+            mins[i] = box.GetMin()
+            maxs[i] = box.GetMax()
+        return mins, maxs
+
+    def compute_world_bound(self, prim_path, time: Usd.TimeCode = Usd.TimeCode.Default()):
+        mins, maxs = self.compute_world_bounds([prim_path], time)
+        return mins[0], maxs[0]
+
+_services = PerStageRegistry(BBoxService)
+
+def get_bbox_service(stage) -> BBoxService:
+    return _services.get(stage)
+
+def release_bbox_service() -> None:
+    _services.release()
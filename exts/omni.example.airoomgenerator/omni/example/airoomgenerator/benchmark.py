@@ -0,0 +1,185 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmarks for the generation pipeline. They print a table and return the rows, run them from the
+# Script Editor, for example:
+#   from omni.example.airoomgenerator.benchmark import benchmark_output_formats
+#   benchmark_output_formats()
+
+import json
+import time
+import numpy as np
+from pxr import Gf, Sdf, Usd, UsdGeom
+from .prompts import assistant_input
+from .compact_format import COLUMNS, parse_compact, to_compact
+from .response_parser import ObjectStreamParser
+from .token_budget import count_tokens
+from .authoring import get_greybox_transform, get_item_name
+from .layout import resolve_layout, count_overlaps
+
+def _print_table(rows: list) -> None:
+    if len(rows) == 0:
+        return
+    columns = list(rows[0].keys())
+    widths = [max(len(column), *[len(_format(row[column])) for row in rows]) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(_format(row[column]).ljust(width) for column, width in zip(columns, widths)))
+
+def _format(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+def _time(fn, repeat: int, cleanup=None) -> float:
+    # Best of repeat runs in milliseconds, cleanup runs untimed after each run
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+        if cleanup is not None:
+            cleanup()
+    return best
+
+def make_objects(count: int) -> list:
+    # Room of count objects built by repeating the warehouse example
+    template = json.loads(assistant_input)["area_objects_list"]
+    objects = []
+    for i in range(count):
+        item = dict(template[i % len(template)])
+        item["object_name"] = item["object_name"].rsplit("_", 1)[0] + "_" + str(i + 1)
+        item["X"] = item["X"] + (i // len(template)) * 10
+        objects.append(item)
+    return objects
+
+def benchmark_output_formats(object_counts=(10, 100, 1000), repeat: int = 20, tokens_per_second: float = 40.0) -> list:
+    # Compares the JSON and compact output formats. Parse times are measured, the generation time is not:
+    # the *_gen_est_s columns estimate it from the number of output tokens at tokens_per_second.
+    results = []
+    for count in object_counts:
+        json_text = json.dumps({"area_name": "Warehouse_Area", "area_objects_list": make_objects(count)}, indent=4)
+        compact_text = to_compact(json_text)
+        assert parse_compact(json.loads(compact_text)) == json.loads(json_text)["area_objects_list"]
+
+        json_tokens = count_tokens(json_text)
+        compact_tokens = count_tokens(compact_text)
+        results.append({
+            "objects": count,
+            "json_tokens": json_tokens,
+            "compact_tokens": compact_tokens,
+            "token_ratio": compact_tokens / json_tokens,
+            "json_gen_est_s": json_tokens / tokens_per_second,
+            "compact_gen_est_s": compact_tokens / tokens_per_second,
+            "json_parse_ms": _time(lambda: json.loads(json_text)["area_objects_list"], repeat),
+            "compact_parse_ms": _time(lambda: parse_compact(json.loads(compact_text)), repeat),
+            "json_stream_ms": _time(lambda: ObjectStreamParser().feed(json_text), repeat),
+            "compact_stream_ms": _time(lambda: ObjectStreamParser("rows", COLUMNS).feed(compact_text), repeat),
+        })
+    _print_table(results)
+    return results
+
+def _author_greyboxes_per_prim(stage, items, root_prim_path: str) -> None:
+    # The previous place_greyboxes authoring, one Usd call and change notice per prim and attribute
+    for item in items:
+        prim_parent_path = root_prim_path + get_item_name(item['object_name'])
+        prim_path = prim_parent_path + "/" + get_item_name(item['object_name'])
+        translate, scale = get_greybox_transform(item)
+        for path, xform, values in (
+            (prim_parent_path, UsdGeom.Xform.Define(stage, prim_parent_path), (Gf.Vec3d(0,0,0), Gf.Vec3d(1,1,1))),
+            (prim_path, UsdGeom.Cube.Define(stage, prim_path), (translate, scale)),
+        ):
+            xform.AddTranslateOp()
+            xform.AddRotateXYZOp()
+            xform.AddScaleOp()
+            prim = xform.GetPrim()
+            prim.GetAttribute('xformOp:translate').Set(values[0])
+            prim.GetAttribute('xformOp:rotateXYZ').Set(Gf.Vec3d(0,0,0))
+            prim.GetAttribute('xformOp:scale').Set(values[1])
+        prim.GetAttribute('extent').Set([(-50.0, -50.0, -50.0), (50.0, 50.0, 50.0)])
+        prim.GetAttribute('size').Set(100)
+        prim.CreateAttribute("object_name", Sdf.ValueTypeNames.String).Set(item['object_name'])
+
+def benchmark_authoring(object_counts=(10, 100, 10000), repeat: int = 3) -> list:
+    # Compares authoring greyboxes prim by prim with place_items, the path Generate takes, with and without
+    # the PointInstancer, and times placing the same list again when nothing changed. Runs on the stage open
+    # in Kit, or a new one, so the cost of Kit and Hydra reacting to the changes is included; the items are
+    # written below /Benchmark and removed again.
+    import carb
+    import omni.usd
+    from .item_generator import place_items
+    context = omni.usd.get_context()
+    if context.get_stage() is None:
+        context.new_stage()
+    stage = context.get_stage()
+    root_prim_path = "/Benchmark/items/"
+    cleanup = lambda: stage.RemovePrim("/Benchmark")
+    settings = carb.settings.get_settings()
+    use_instancer = settings.get_as_bool("/exts/omni.example.airoomgenerator/greybox/use_instancer")
+
+    def place(items, instanced: bool):
+        settings.set_bool("/exts/omni.example.airoomgenerator/greybox/use_instancer", instanced)
+        place_items(items, [None] * len(items), root_prim_path)
+
+    results = []
+    try:
+        for count in object_counts:
+            items = make_objects(count)
+            per_prim_ms = _time(lambda: _author_greyboxes_per_prim(stage, items, root_prim_path), repeat, cleanup)
+            batched_ms = _time(lambda: place(items, False), repeat, cleanup)
+            instancer_ms = _time(lambda: place(items, True), repeat, cleanup)
+            place(items, False)
+            unchanged_ms = _time(lambda: place(items, False), repeat)
+            cleanup()
+            results.append({
+                "objects": count,
+                "per_prim_ms": per_prim_ms,
+                "batched_ms": batched_ms,
+                "instancer_ms": instancer_ms,
+                "unchanged_ms": unchanged_ms,
+                "speedup": per_prim_ms / batched_ms,
+                "instancer_speedup": per_prim_ms / instancer_ms,
+            })
+    finally:
+        settings.set_bool("/exts/omni.example.airoomgenerator/greybox/use_instancer", use_instancer)
+    _print_table(results)
+    return results
+
+def make_scattered_objects(count: int, area_size: float, seed: int = 0) -> list:
+    # count objects of the warehouse example sizes at random spots of a square area, overlapping at random
+    rng = np.random.default_rng(seed)
+    template = make_objects(count)
+    for item in template:
+        item["X"] = float(rng.uniform(-area_size * 0.5, area_size * 0.5))
+        item["Z"] = float(rng.uniform(-area_size * 0.5, area_size * 0.5))
+    return template
+
+def benchmark_layout(object_counts=(100, 1000, 10000), repeat: int = 5, max_iterations: int = 256, spacing: float = 300.0) -> list:
+    # Times resolve_layout on areas that give every object about spacing x spacing cm, and counts the
+    # overlapping pairs before and after
+    results = []
+    for count in object_counts:
+        area_size = float(np.sqrt(count)) * spacing
+        objects = make_scattered_objects(count, area_size)
+        resolved = resolve_layout(objects, area_size, area_size, max_iterations)
+        results.append({
+            "objects": count,
+            "layout_ms": _time(lambda: resolve_layout(objects, area_size, area_size, max_iterations), repeat),
+            "overlaps_before": count_overlaps(objects),
+            "overlaps_after": count_overlaps(resolved),
+        })
+    _print_table(results)
+    return results
@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+
+def make_cache_key(*parts) -> str:
+    # Parts must be JSON serializable, the key is stable across sessions
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class PersistentLRUCache:
+    # LRU cache with an optional time to live, persisted as a JSON file.
+    # Values must be JSON serializable.
+    def __init__(self, path: str = None, max_entries: int = 256, ttl: float = None) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._dirty = False
+        self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def get(self, key: str, default=None, count: bool = True):
+        entry = self._entries.get(key, None)
+        if entry is not None and self._is_expired(entry):
+            del self._entries[key]
+            self._dirty = True
+            entry = None
+        if entry is None:
+            if count:
+                self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        if count:
+            self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, value) -> None:
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._dirty = True
+
+    def invalidate(self, key: str = None) -> None:
+        # Drops a single entry, or everything when no key is given
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        self._dirty = True
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total > 0 else 0.0,
+        }
+
+    def load(self) -> None:
+        if self.path is None or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # A corrupt cache file is not worth failing a generation over
+            return
+        for key, timestamp, value in data.get("entries", []):
+            self._entries[key] = (timestamp, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        now = time.time()
+        entries = [[key, entry[0], entry[1]] for key, entry in self._entries.items()
+                   if not self._is_expired(entry, now)]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so an interrupted save never leaves a broken cache
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": entries}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def _is_expired(self, entry, now: float = None) -> bool:
+        if self.ttl is None or self.ttl <= 0:
+            return False
+        if now is None:
+            now = time.time()
+        return now - entry[0] > self.ttl
+
+def open_extension_cache(name: str) -> PersistentLRUCache:
+    # Cache persisted as <name>.json in the extension's data folder, sized by the <name>/max_entries and
+    # <name>/ttl settings. Only this function needs Kit, the batch generator uses the rest of the module.
+    import carb
+    import carb.tokens
+    settings = carb.settings.get_settings()
+    prefix = "/exts/omni.example.airoomgenerator/" + name
+    cache_dir = carb.tokens.get_tokens_interface().resolve("${data}/omni.example.airoomgenerator")
+    return PersistentLRUCache(
+        path=os.path.join(cache_dir, name + ".json"),
+        max_entries=settings.get_as_int(prefix + "/max_entries"),
+        ttl=settings.get_as_float(prefix + "/ttl"))
@@ -14,102 +14,432 @@
 # limitations under the License.
 
 import json
+import time
 import carb
-import aiohttp
+import carb.tokens
 import asyncio
-from .prompts import system_input, user_input, assistant_input
-from .deep_search import query_items
-from .item_generator import place_greyboxes, place_deepsearch_results
+import aiohttp
+from .http_session import get_session
+from .cache import PersistentLRUCache, make_cache_key, open_extension_cache
+from .response_parser import ObjectStreamParser, parse_objects, validate_object
+from .rate_limiter import RequestLimiter
+from .token_budget import PromptBudget, fit_to_budget
+from .few_shot import FewShotIndex
+from .singleflight import SingleFlight
+from .tracing import get_tracer
+from .retry import RetryableError, RETRYABLE_STATUS, LatencyTracker, parse_retry_after, call_with_retries, call_hedged
+from .prompts import assistant_input, few_shot_examples, build_area_prompt, build_messages
+from .compact_format import COLUMNS
+from .deep_search import query_items_with_fallback, query_first_canonical, query_local, save_search_cache
+from .item_generator import place_items, get_area_layer, save_area_layer
+from .layout import resolve_layout
+
+_response_cache = None
+_request_limiter = None
+_latencies = LatencyTracker()
+_few_shot_index = None
+# Identical requests in flight at the same time share one upstream call
+_in_flight = SingleFlight()
+
+def get_response_cache() -> PersistentLRUCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = open_extension_cache("response_cache")
+    return _response_cache
+
+def get_request_limiter() -> RequestLimiter:
+    global _request_limiter
+    if _request_limiter is None:
+        settings = carb.settings.get_settings()
+        _request_limiter = RequestLimiter(
+            max_concurrency=settings.get_as_int("/exts/omni.example.airoomgenerator/rate_limit/max_concurrency"),
+            requests_per_minute=settings.get_as_float("/exts/omni.example.airoomgenerator/rate_limit/requests_per_minute"),
+            tokens_per_minute=settings.get_as_float("/exts/omni.example.airoomgenerator/rate_limit/tokens_per_minute"))
+    return _request_limiter
+
+def get_few_shot_index() -> FewShotIndex:
+    global _few_shot_index
+    if _few_shot_index is None:
+        _few_shot_index = FewShotIndex(few_shot_examples)
+    return _few_shot_index
+
+def normalize_prompt(prompt: str) -> str:
+    # Collapse newlines and repeated whitespace so cosmetic edits still hit the cache
+    return " ".join(prompt.split())
+
+async def _check_response(r):
+    if r.status == 200:
+        return
+    message = await r.text()
+    if r.status in RETRYABLE_STATUS:
+        raise RetryableError(f"{r.status}: {message}", parse_retry_after(r.headers.get("Retry-After")))
+    raise RuntimeError(f"{r.status}: {message}")
+
+def make_stream_parser(compact: bool = False) -> ObjectStreamParser:
+    if compact:
+        return ObjectStreamParser("rows", COLUMNS)
+    return ObjectStreamParser()
+
+def make_object_callback(on_object, compact: bool = False):
+    # Returns an on_delta that hands objects to on_object as soon as their JSON is complete
+    parser = make_stream_parser(compact)
+    def on_delta(delta):
+        for item in parser.feed(delta):
+            item = validate_object(item)
+            if item is not None:
+                on_object(item)
+    return on_delta
+
+async def _stream_completion(session, url: str, headers: dict, parameters: dict, on_delta):
+    # Reads the server-sent events of a streamed completion and hands every piece of text to on_delta
+    chunks = []
+    async with session.post(url, headers=headers, json=dict(parameters, stream=True)) as r:
+        await _check_response(r)
+        async for line in r.content:
+            line = line.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            payload = line[len("data:"):].strip()
+            if payload == "[DONE]":
+                break
+            delta = json.loads(payload)["choices"][0]["delta"].get("content")
+            if delta:
+                chunks.append(delta)
+                on_delta(delta)
+    return "".join(chunks)
+
+async def _request_completion(parameters: dict, apikey: str, on_delta=None, prompt_tokens: int = 0) -> str:
+    # A single attempt, raises RetryableError for failures worth repeating
+    settings = carb.settings.get_settings()
+    chatgpt_url = "https://api.openai.com/v1/chat/completions"
+    headers = {"Authorization": "Bearer %s" % apikey}
+    # Create a completion using the chatGPT model
+    session = get_session()
+    # Count the prompt plus the expected completion against the tokens per minute quota
+    tokens = prompt_tokens + settings.get_as_int(
+        "/exts/omni.example.airoomgenerator/rate_limit/expected_completion_tokens")
+    async with get_request_limiter().limit(tokens):
+        try:
+            if on_delta is not None:
+                return await _stream_completion(session, chatgpt_url, headers, parameters, on_delta)
+            start = time.monotonic()
+            async with session.post(chatgpt_url, headers=headers, json=parameters) as r:
+                await _check_response(r)
+                response = await r.json()
+            _latencies.record(time.monotonic() - start)
+            return response["choices"][0]["message"]['content']
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            raise RetryableError(str(e) or type(e).__name__)
+
+async def _request_with_retries(parameters: dict, apikey: str, make_on_delta=None, deadline: float = None,
+                               prompt_tokens: int = 0) -> str:
+    # make_on_delta returns the delta callback of a streamed request, None for a plain request
+    settings = carb.settings.get_settings()
+    # Hedging a stream would place every object twice, so only plain requests are hedged
+    hedge_after = None
+    if make_on_delta is None and settings.get_as_bool("/exts/omni.example.airoomgenerator/hedge/enabled"):
+        hedge_after = _latencies.percentile(
+            settings.get_as_float("/exts/omni.example.airoomgenerator/hedge/percentile"),
+            settings.get_as_int("/exts/omni.example.airoomgenerator/hedge/min_samples"))
 
-async def chatGPT_call(prompt: str):
+    async def attempt():
+        # A stream that failed partway starts over, so every attempt parses it with a fresh callback
+        on_delta = make_on_delta() if make_on_delta is not None else None
+        return await call_hedged(lambda: _request_completion(parameters, apikey, on_delta, prompt_tokens), hedge_after)
+
+    return await call_with_retries(
+        attempt,
+        max_retries=settings.get_as_int("/exts/omni.example.airoomgenerator/retry/max_retries"),
+        base_delay=settings.get_as_float("/exts/omni.example.airoomgenerator/retry/base_delay"),
+        max_delay=settings.get_as_float("/exts/omni.example.airoomgenerator/retry/max_delay"),
+        deadline=deadline)
+
+async def chatGPT_call(prompt: str, on_object=None, example: dict = None):
     # Load your API key from an environment variable or secret management service
     settings = carb.settings.get_settings()
     
     apikey = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/APIKey")
-    my_prompt = prompt.replace("\n", " ")
-    
-    # Send a request API
-    try:
+    tracer = get_tracer()
+    with tracer.span("prompt_build"):
+        my_prompt = normalize_prompt(prompt)
+        # The compact format sends the object keys once instead of for every object
+        compact = settings.get_as_string("/exts/omni.example.airoomgenerator/prompt/output_format") == "compact"
         parameters = {
             "model": "gpt-3.5-turbo",
-            "messages": [
-                    {"role": "system", "content": system_input},
-                    {"role": "user", "content": user_input},
-                    {"role": "assistant", "content": assistant_input},
-                    {"role": "user", "content": my_prompt}
-                ]
+            "messages": build_messages(my_prompt, example, compact)
         }
-        chatgpt_url = "https://api.openai.com/v1/chat/completions"
-        headers = {"Authorization": "Bearer %s" % apikey}
-        # Create a completion using the chatGPT model
-        async with aiohttp.ClientSession() as session:
-            async with session.post(chatgpt_url, headers=headers, json=parameters) as r:
-                response = await r.json()
-        text = response["choices"][0]["message"]['content']
-    except Exception as e:
-        carb.log_error("An error as occurred")
-        return None, str(e)
-
-    # Parse data that was given from API
-    try: 
-        #convert string to  object
-        data = json.loads(text)
-    except ValueError as e:
-        carb.log_error(f"Exception occurred: {e}")
+
+        max_prompt_tokens = settings.get_as_int("/exts/omni.example.airoomgenerator/prompt/max_tokens")
+        messages, budget = fit_to_budget(parameters["messages"], max_prompt_tokens, parameters["model"])
+        if len(messages) < len(parameters["messages"]):
+            # Drop the example rather than sending a prompt over budget
+            carb.log_warn(f"{budget.describe()} is over the budget of {max_prompt_tokens}, sending without an example")
+            parameters["messages"] = messages
+            budget = PromptBudget(messages, parameters["model"])
+        carb.log_info(budget.describe())
+
+    # Regenerating the same area with the same prompt does not need to go over the network
+    cache = get_response_cache()
+    use_cache = not settings.get_as_bool("/exts/omni.example.airoomgenerator/response_cache/bypass")
+    cache_key = make_cache_key(parameters["model"], parameters["messages"])
+    text = cache.get(cache_key) if use_cache else None
+
+    make_on_delta = None
+    if on_object is not None:
+        make_on_delta = lambda: make_object_callback(on_object, compact)
+
+    shared = False
+    if text is None:
+        # Send a request API, retries and hedged requests all share one deadline
+        timeout = settings.get_as_float("/exts/omni.example.airoomgenerator/retry/deadline")
+        if timeout <= 0:
+            timeout = None
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            with tracer.span("http", stream=make_on_delta is not None):
+                text, shared = await _in_flight.do(cache_key, lambda: asyncio.wait_for(
+                    _request_with_retries(parameters, apikey, make_on_delta, deadline, budget.total), timeout))
+        except asyncio.TimeoutError:
+            carb.log_error("ChatGPT request timed out")
+            return None, f"No response from ChatGPT within {timeout} seconds"
+        except Exception as e:
+            carb.log_error("An error as occurred")
+            return None, str(e)
+        from_cache = False
+        if shared and make_on_delta is not None:
+            # Only the caller that started the request streamed it, replay it for this one
+            make_on_delta()(text)
+    else:
+        from_cache = True
+        if on_object is not None:
+            # Replay cached responses through the same callback as a live stream
+            make_on_delta()(text)
+    if use_cache:
+        carb.log_info(f"Response cache: {cache.stats()}")
+
+    # Parse data that was given from API, recovering whatever objects are usable
+    with tracer.span("parse"):
+        object_list, complete = parse_objects(text, compact)
+    if object_list is None:
+        carb.log_error("Could not parse any objects from the response")
         return None, text
-    else: 
-        # Get area_objects_list
-        object_list = data['area_objects_list']
-        
-        return object_list, text
+    if not complete:
+        carb.log_warn(f"Recovered {len(object_list)} objects from a malformed response")
 
-async def call_Generate(prim_info, prompt, use_chatgpt, use_deepsearch, response_label, progress_widget):
-    run_loop = asyncio.get_event_loop()
-    progress_widget.show_bar(True)
-    task = run_loop.create_task(progress_widget.play_anim_forever())
+    # Only cache clean responses, a bad answer should be retried on the next click.
+    # A shared response is cached by the caller that made the request.
+    if use_cache and not from_cache and not shared and complete:
+        cache.put(cache_key, text)
+        cache.save()
+
+    return object_list, text
+
+async def _place_streamed_object(item, root_prim_path, nucleus_path, filter_paths, layer=None):
+    # Returns the search result the object was placed with, None for a greybox.
+    # nucleus_path is empty when deep search is not used, the local asset index is always consulted.
+    tracer = get_tracer()
+    settings = carb.settings.get_settings()
+    strip_adjectives = settings.get_as_bool("/exts/omni.example.airoomgenerator/deepsearch/strip_adjectives")
+    timeout = settings.get_as_float("/exts/omni.example.airoomgenerator/deepsearch/query_timeout")
+    query_result = None
+    with tracer.span("search"):
+        if nucleus_path != "":
+            # Like query_items, a deep search that fails or times out falls back to the local index
+            try:
+                query_result = await asyncio.wait_for(query_first_canonical(
+                    item['object_name'], nucleus_path, filter_paths, strip_adjectives=strip_adjectives), timeout)
+            except asyncio.TimeoutError:
+                carb.log_warn(f"Search for {item['object_name']} timed out after {timeout} seconds")
+            except Exception as e:
+                carb.log_warn(f"Search for {item['object_name']} failed: {e}")
+        if query_result is None:
+            query_result = (await query_local([item['object_name']], strip_adjectives))[0]
+    with tracer.span("placement", objects=1):
+        place_items(
+            gpt_results=[item],
+            query_result=[query_result],
+            root_prim_path=root_prim_path,
+            remove_missing=False,
+            layer=layer)
+    return query_result
+
+async def _place_streamed_object_bounded(semaphore, timeout, item, *args):
+    # A failed or slow placement leaves the object to the final reconcile instead of failing the generation
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(_place_streamed_object(item, *args), timeout)
+        except asyncio.TimeoutError:
+            carb.log_warn(f"Placing {item['object_name']} took longer than {timeout} seconds")
+        except Exception as e:
+            carb.log_error(f"Could not place {item['object_name']}: {e}")
+        return None
+
+async def generate_area(prim_info, prompt, use_chatgpt, use_deepsearch, use_stream=False) -> str:
+    # Generates and places the items of one area, returns the response text for the log
+    tracer = get_tracer()
+    tracer.enabled = carb.settings.get_settings().get_as_bool("/exts/omni.example.airoomgenerator/tracing/enabled")
+    # Every area gets its own track in the exported trace
+    token = tracer.set_track(prim_info.area_name or "GPT")
+    try:
+        with tracer.span("generate"):
+            return await _generate_area(prim_info, prompt, use_chatgpt, use_deepsearch, use_stream)
+    finally:
+        tracer.reset_track(token)
+
+async def _generate_area(prim_info, prompt, use_chatgpt, use_deepsearch, use_stream=False) -> str:
+    tracer = get_tracer()
     response = ""
     #chain the prompt
     area_name = prim_info.area_name.split("/World/Layout/")
-    concat_prompt = area_name[-1].replace("_", " ") + ", " + prim_info.length + "x" + prim_info.width + ", origin at (0.0, 0.0, 0.0), generate a list of appropriate items in the correct places. " + prompt
+    concat_prompt = build_area_prompt(area_name[-1].replace("_", " "), prim_info.length, prim_info.width, prompt)
     root_prim_path = "/World/Layout/GPT/"
     if prim_info.area_name != "":
         root_prim_path= prim_info.area_name + "/items/"
+    # Taken now so the results land in the candidate this generation was started for
+    layer = get_area_layer(prim_info.area_name)
+
+    settings = carb.settings.get_settings()
+    # Without deep search only the local asset index is searched
+    nucleus_path = ""
+    if use_deepsearch:
+        nucleus_path = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/deepsearch_nucleus_path")
+    path_filter = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/path_filter")
+    filter_paths = [path.strip() for path in path_filter.split(',') if path.strip() != ""]
+    
+    example = None
+    if settings.get_as_bool("/exts/omni.example.airoomgenerator/prompt/select_example"):
+        example = get_few_shot_index().select(
+            area_name[-1].replace("_", " "), float(prim_info.length), float(prim_info.width))
+
+    if use_chatgpt and use_stream:
+        # Place every object as soon as it arrives instead of waiting for the whole room
+        run_loop = asyncio.get_event_loop()
+        placements = {}
+        semaphore = asyncio.Semaphore(settings.get_as_int("/exts/omni.example.airoomgenerator/stream/max_concurrency"))
+        timeout = settings.get_as_float("/exts/omni.example.airoomgenerator/stream/placement_timeout")
+        def on_object(item):
+            # A retried stream sends the objects again, the latest copy of an object replaces the earlier one
+            name = item['object_name']
+            if name in placements:
+                placements[name].cancel()
+            placements[name] = run_loop.create_task(_place_streamed_object_bounded(
+                semaphore, timeout, item, root_prim_path, nucleus_path, filter_paths, layer))
+        objects, response = await chatGPT_call(concat_prompt, on_object=on_object, example=example)
+        searched = dict(zip(placements.keys(), await asyncio.gather(*placements.values())))
+        if objects is not None:
+            # The final list is the answer of the attempt that succeeded, objects an aborted attempt streamed
+            # are removed and the ones the layout pass moved are moved. Search results are reused by name,
+            # objects that were not streamed are searched now.
+            objects = _resolve_layout(objects, prim_info)
+            unsearched = [item['object_name'] for item in objects if item['object_name'] not in searched]
+            if len(unsearched) > 0:
+                with tracer.span("search", queries=len(unsearched)):
+                    searched.update(zip(unsearched, await _search_items(unsearched, nucleus_path, filter_paths)))
+            with tracer.span("placement", objects=len(objects)):
+                place_items(
+                    gpt_results=objects,
+                    query_result=[searched[item['object_name']] for item in objects],
+                    root_prim_path=root_prim_path,
+                    layer=layer)
+        save_search_cache()
+        save_area_layer(layer)
+        return response
     
     if use_chatgpt:          #when calling the API
-        objects, response = await chatGPT_call(concat_prompt)
+        objects, response = await chatGPT_call(concat_prompt, example=example)
     else:                       #when testing and you want to skip the API call
         data = json.loads(assistant_input)
         objects = data['area_objects_list']
     if objects is None:
-        response_label.text = response
-        return 
+        return response
+    objects = _resolve_layout(objects, prim_info)
 
-    if use_deepsearch:
-        settings = carb.settings.get_settings()
-        nucleus_path = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/deepsearch_nucleus_path")
-        filter_path = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/filter_path")
-        filter_paths = filter_path.split(',')
-        
-        queries = list()                        
-        for item in objects:
-            queries.append(item['object_name'])
-
-        query_result = await query_items(queries=queries, url=nucleus_path, paths=filter_paths)
-        if query_result is not None:
-            place_deepsearch_results(
-                gpt_results=objects,
-                query_result=query_result,
-                root_prim_path=root_prim_path)
-        else:
-            place_greyboxes(                    
-                gpt_results=objects,
-                root_prim_path=root_prim_path)
-    else:
-        place_greyboxes(                    
+    queries = list()                        
+    for item in objects:
+        queries.append(item['object_name'])
+
+    with tracer.span("search", queries=len(queries)):
+        query_result = await _search_items(queries, nucleus_path, filter_paths)
+
+    # Only the objects that changed since the last generation of this area are authored
+    with tracer.span("placement", objects=len(objects)):
+        place_items(
             gpt_results=objects,
-            root_prim_path=root_prim_path)
-    
-    task.cancel()
-    await asyncio.sleep(1)
-    response_label.text = response
-    progress_widget.show_bar(False)
+            query_result=query_result,
+            root_prim_path=root_prim_path,
+            layer=layer)
+    save_area_layer(layer)
+    return response
+
+async def _search_items(queries, nucleus_path, filter_paths) -> list:
+    # Deep search when it is used, then the local asset index for whatever is left
+    settings = carb.settings.get_settings()
+    return await query_items_with_fallback(
+        queries=queries,
+        url=nucleus_path,
+        paths=filter_paths,
+        max_concurrency=settings.get_as_int("/exts/omni.example.airoomgenerator/deepsearch/max_concurrency"),
+        timeout=settings.get_as_float("/exts/omni.example.airoomgenerator/deepsearch/query_timeout"),
+        canonicalize=settings.get_as_bool("/exts/omni.example.airoomgenerator/deepsearch/canonicalize"),
+        strip_adjectives=settings.get_as_bool("/exts/omni.example.airoomgenerator/deepsearch/strip_adjectives"))
+
+def _resolve_layout(objects, prim_info) -> list:
+    # Keeps objects inside the area and pushes overlapping ones apart
+    settings = carb.settings.get_settings()
+    if not settings.get_as_bool("/exts/omni.example.airoomgenerator/layout/resolve_overlaps"):
+        return objects
+    with get_tracer().span("layout", objects=len(objects)):
+        return resolve_layout(
+            objects,
+            float(prim_info.length),
+            float(prim_info.width),
+            max_iterations=settings.get_as_int("/exts/omni.example.airoomgenerator/layout/max_iterations"),
+            gap=settings.get_as_float("/exts/omni.example.airoomgenerator/layout/gap"))
+
+def _report_trace() -> str:
+    # Writes the Chrome trace of the session so far and returns the per stage summary for the log
+    tracer = get_tracer()
+    if not tracer.enabled:
+        return ""
+    trace_path = carb.tokens.get_tokens_interface().resolve("${data}/omni.example.airoomgenerator/trace.json")
+    try:
+        tracer.export_chrome_trace(trace_path)
+    except OSError as e:
+        carb.log_warn(f"Could not write trace to {trace_path}: {e}")
+    return "\n\n" + tracer.describe()
+
+async def call_Generate(prim_info, prompt, use_chatgpt, use_deepsearch, response_label, progress_widget, use_stream=False):
+    run_loop = asyncio.get_event_loop()
+    progress_widget.show_bar(True)
+    task = run_loop.create_task(progress_widget.play_anim_forever())
+    try:
+        response = await generate_area(prim_info, prompt, use_chatgpt, use_deepsearch, use_stream)
+        await asyncio.sleep(1)
+        response_label.text = response + _report_trace()
+    except Exception as e:
+        carb.log_error(f"Generation failed for {prim_info.area_name}: {e}")
+        response_label.text = str(e)
+    finally:
+        task.cancel()
+        progress_widget.show_bar(False)
+
+async def call_Generate_all(areas, use_chatgpt, use_deepsearch, response_label, progress_widget, use_stream=False):
+    # areas is a list of (prim_info, prompt). All areas are generated concurrently,
+    # the request limiter keeps them within the API quotas.
+    run_loop = asyncio.get_event_loop()
+    progress_widget.show_bar(True)
+    task = run_loop.create_task(progress_widget.play_anim_forever())
+    try:
+        results = await asyncio.gather(
+            *[generate_area(prim_info, prompt, use_chatgpt, use_deepsearch, use_stream) for prim_info, prompt in areas],
+            return_exceptions=True)
+        log = []
+        for (prim_info, _), result in zip(areas, results):
+            if isinstance(result, Exception):
+                carb.log_error(f"Generation failed for {prim_info.area_name}: {result}")
+                result = str(result)
+            log.append(prim_info.area_name + ":\n" + result)
+        response_label.text = "\n\n".join(log) + _report_trace()
+    finally:
+        task.cancel()
+        progress_widget.show_bar(False)
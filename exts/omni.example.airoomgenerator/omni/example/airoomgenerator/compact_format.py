@@ -0,0 +1,34 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+# The compact wire format sends the object keys once as a header and every object as a row:
+# {"area_name": "Office", "columns": [...], "rows": [["Wooden_Desk_1", -150, 0, -100, 160, 80, 75, "Oak"], ...]}
+COLUMNS = ["object_name", "X", "Y", "Z", "Length", "Width", "Height", "Material"]
+
+def row_to_object(row: list, columns: list = COLUMNS) -> dict:
+    return dict(zip(columns, row))
+
+def parse_compact(data: dict) -> list:
+    # Returns the same dicts as the area_objects_list of the JSON format
+    columns = data.get("columns", COLUMNS)
+    return [row_to_object(row, columns) for row in data["rows"]]
+
+def to_compact(text: str) -> str:
+    # Converts a response in the JSON format, used to turn the few-shot examples into compact ones
+    data = json.loads(text)
+    rows = [[item[column] for column in COLUMNS] for item in data["area_objects_list"]]
+    return json.dumps({"area_name": data["area_name"], "columns": COLUMNS, "rows": rows}, separators=(",", ":"))
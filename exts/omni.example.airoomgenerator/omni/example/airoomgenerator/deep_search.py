@@ -14,21 +14,181 @@
 # limitations under the License.
 
 from omni.kit.ngsearch.client import NGSearchClient
+import os
+import re
+import time
 import asyncio
 import carb
+import carb.tokens
+from .cache import PersistentLRUCache, make_cache_key, open_extension_cache
+from .singleflight import SingleFlight
+from .local_index import LocalAssetIndex
 
-async def query_items(queries, url: str, paths):
+# Descriptive words ChatGPT adds to object names that rarely change which asset is the best match
+_ADJECTIVES = {
+    "big", "black", "blue", "brown", "comfortable", "cozy", "duty", "elegant", "empty", "full", "glass", "gray",
+    "green", "grey", "heavy", "industrial", "large", "leather", "light", "long", "metal", "metallic", "modern",
+    "narrow", "new", "old", "plastic", "portable", "red", "round", "short", "small", "square", "steel", "sturdy",
+    "tall", "white", "wide", "wooden", "yellow",
+}
 
-    result = list(tuple())        
+_in_flight = SingleFlight()
+_local_index = None
+_local_index_task = None
+
+_search_cache = None
+
+def get_search_cache() -> PersistentLRUCache:
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = open_extension_cache("search_cache")
+    return _search_cache
+
+def save_search_cache():
+    if _search_cache is not None:
+        _search_cache.save()
+
+def clear_search_cache():
+    # Results depend on the nucleus path and path filters, call this whenever they change
+    cache = get_search_cache()
+    cache.invalidate()
+    cache.save()
+
+def get_local_index() -> LocalAssetIndex:
+    # Index of the local asset folder from the settings. None when no folder is configured or while
+    # the index of a new folder is still being built in the background.
+    folder = carb.settings.get_settings().get_as_string("/persistent/exts/omni.example.airoomgenerator/local_asset_dir")
+    if folder == "" or not os.path.isdir(folder):
+        return None
+    refresh_local_index()
+    if _local_index is None or _local_index.root != os.path.normpath(folder):
+        return None
+    return _local_index
+
+def refresh_local_index(force: bool = False):
+    # Loads and re-crawls the local asset folder in a worker thread when the index is missing, for another
+    # folder, or older than refresh_interval. Searches keep using the previous index until the new one is
+    # ready, so a crawl never holds up a generation. Returns the running task, None when nothing is to do.
+    global _local_index_task
+    settings = carb.settings.get_settings()
+    folder = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/local_asset_dir")
+    if folder == "" or not os.path.isdir(folder):
+        return None
+    if _local_index_task is not None and not _local_index_task.done():
+        return _local_index_task
+    interval = settings.get_as_float("/exts/omni.example.airoomgenerator/local_index/refresh_interval")
+    stale = _local_index is None or _local_index.root != os.path.normpath(folder) \
+        or time.time() - _local_index.last_refresh > interval
+    if not force and not stale:
+        return None
+    _local_index_task = asyncio.ensure_future(_refresh_local_index(folder))
+    return _local_index_task
+
+async def _refresh_local_index(folder: str) -> None:
+    global _local_index
+    index_path = carb.tokens.get_tokens_interface().resolve("${data}/omni.example.airoomgenerator/local_index.json")
+
+    def build():
+        # A new index is built and swapped in, searches never read one that is being crawled
+        index = LocalAssetIndex(folder, index_path)
+        return index, index.refresh()
+    try:
+        index, (added, updated, removed) = await asyncio.get_event_loop().run_in_executor(None, build)
+    except OSError as e:
+        carb.log_warn(f"Could not index local assets in {folder}: {e}")
+        return
+    _local_index = index
+    carb.log_info(f"Local asset index: {len(index)} assets, {added} added, {updated} updated, {removed} removed")
+
+async def query_local(queries, strip_adjectives: bool = False):
+    # Resolves names against the local asset index, same result shape as query_items
+    index = get_local_index()
+    if index is None:
+        return [None] * len(queries)
+    result = []
     for query in queries:
-        query_result = await _query_first(query, url, paths)
+        found = index.query_first(canonicalize_query(query, strip_adjectives))
+        result.append((query, found[1]) if found is not None else None)
+    return result
 
-        if query_result is not None:
-            result.append(query_result)
-        
+async def query_items_with_fallback(queries, url: str, paths, **kwargs):
+    # Deep search first when a nucleus path is configured, then the local asset index for
+    # whatever it did not resolve. kwargs are passed on to query_items.
+    if url != "":
+        result = await query_items(queries, url, paths, **kwargs)
+    else:
+        result = [None] * len(queries)
+    misses = [i for i, item in enumerate(result) if item is None]
+    if len(misses) > 0:
+        local = await query_local([queries[i] for i in misses], kwargs.get("strip_adjectives", False))
+        for i, item in zip(misses, local):
+            result[i] = item
     return result
 
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def canonicalize_query(query: str, strip_adjectives: bool = False) -> str:
+    # "Parts_Pallet_1" -> "parts pallet", and with strip_adjectives "Wooden Pallet" -> "pallet".
+    # Only trailing numbers are dropped, "2 Seat Sofa" keeps its 2 and a name of only digits is kept.
+    query = re.sub(r"([a-z])([A-Z])", r"\1 \2", query)
+    words = [word for word in re.split(r"[\s_\-]+", query.lower()) if word != ""]
+    while len(words) > 1 and words[-1].isdigit():
+        words.pop()
+    if len(words) == 0:
+        return normalize_query(query)
+    if strip_adjectives:
+        nouns = [word for word in words if word not in _ADJECTIVES]
+        # Keep the name whole if it is nothing but adjectives
+        if len(nouns) > 0:
+            words = nouns
+    return " ".join(words)
+
+def _search_key(kind: str, query: str, url: str, paths) -> str:
+    return make_cache_key(kind, normalize_query(query), url.rstrip("/"), sorted(str(path) for path in paths))
+
+async def query_items(queries, url: str, paths, max_concurrency: int = 8, timeout: float = 10.0,
+                      canonicalize: bool = False, strip_adjectives: bool = False):
+    # Runs up to max_concurrency searches at once. Results are in the order of queries,
+    # a query that failed, timed out or found nothing gives None.
+    if canonicalize:
+        # Search every distinct canonical query once and share the result with all names that map to it
+        canonical = [canonicalize_query(query, strip_adjectives) for query in queries]
+        unique = list(dict.fromkeys(canonical))
+        found = dict(zip(unique, await query_items(unique, url, paths, max_concurrency, timeout)))
+        return [(query, found[key][1]) if found[key] is not None else None for query, key in zip(queries, canonical)]
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def query_one(query):
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(_query_first(query, url, paths), timeout)
+            except asyncio.TimeoutError:
+                carb.log_warn(f"Search for {query} timed out after {timeout} seconds")
+            except Exception as e:
+                carb.log_warn(f"Search for {query} failed: {e}")
+            return None
+
+    result = list(await asyncio.gather(*[query_one(query) for query in queries]))
+    save_search_cache()
+    return result
+
+async def query_first_canonical(query: str, url: str, paths, strip_adjectives: bool = False):
+    # Like _query_first for a single name, concurrent calls that canonicalize to the same
+    # query share one search. The result keeps the original name.
+    canonical = canonicalize_query(query, strip_adjectives)
+    result, _ = await _in_flight.do(_search_key("first", canonical, url, paths),
+                                    lambda: _query_first(canonical, url, paths))
+    return (query, result[1]) if result is not None else None
+
 async def _query_first(query: str, url: str, paths):
+    # Cached by normalized query, an empty uri records that nothing was found
+    cache = get_search_cache()
+    cache_key = _search_key("first", query, url, paths)
+    uri = cache.get(cache_key)
+    if uri is not None:
+        return (query, uri) if uri != "" else None
 
     filtered_query = "ext:usd,usdz,usda "
 
@@ -49,7 +209,9 @@ async def _query_first(query: str, url: str, paths):
     
     if search_result is not None:
         if len(search_result.paths) > 0:
+            cache.put(cache_key, search_result.paths[0].uri)
             return (query, search_result.paths[0].uri)
+        cache.put(cache_key, "")
     else:
         carb.log_warn(f"Search Results came up with nothing for {query}. Make sure you've configured your nucleus path")
     return None
@@ -58,4 +220,3 @@ async def query_all(query: str, url: str, paths):
 
     filtered_query = "ext:usd,usdz,usda " + query
     return await NGSearchClient.get_instance().find2(query=filtered_query, url=url)
-        
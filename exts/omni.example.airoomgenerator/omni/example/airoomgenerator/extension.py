@@ -14,7 +14,17 @@
 # limitations under the License.
 
 import omni.ext
+import omni.usd
+import carb
+import asyncio
 from .window import GenAIWindow
+from .http_session import configure_session, open_session, close_session
+from .deep_search import save_search_cache, refresh_local_index
+from .asset_metrics import save_metrics_cache
+from .material_registry import release_material_registry
+from .bbox_service import release_bbox_service
+from .item_generator import export_area_layers
+from .area_layers import release_area_layers
 
 # Any class derived from `omni.ext.IExt` in top level module (defined in `python.modules` of `extension.toml`) will be
 # instantiated when extension gets enabled and `on_startup(ext_id)` will be called. Later when extension gets disabled
@@ -23,8 +33,33 @@ class MyExtension(omni.ext.IExt):
     # ext_id is current extension id. It can be used with extension manager to query additional information, like where
     # this extension is located on filesystem.
     def on_startup(self, ext_id):
+        settings = carb.settings.get_settings()
+        configure_session(
+            keepalive_timeout=settings.get("/exts/omni.example.airoomgenerator/http/keepalive_timeout"),
+            limit=settings.get("/exts/omni.example.airoomgenerator/http/limit"),
+            limit_per_host=settings.get("/exts/omni.example.airoomgenerator/http/limit_per_host"),
+            dns_cache_ttl=settings.get("/exts/omni.example.airoomgenerator/http/dns_cache_ttl"),
+            connect_timeout=settings.get("/exts/omni.example.airoomgenerator/http/connect_timeout"),
+            total_timeout=settings.get("/exts/omni.example.airoomgenerator/http/total_timeout"))
+        # The session has to be created from within the event loop
+        asyncio.get_event_loop().call_soon(open_session)
         self._window = GenAIWindow("Generate Room", width=400, height=525)
-        
+        # Index the local asset folder now instead of on the first generation
+        refresh_local_index()
+        self._stage_event_sub = omni.usd.get_context().get_stage_event_stream().create_subscription_to_pop(
+            self._on_stage_event, name="airoomgenerator area layers")
+
+    def _on_stage_event(self, event):
+        if event.type == int(omni.usd.StageEventType.SAVED):
+            export_area_layers()
+
     def on_shutdown(self):
+        self._stage_event_sub = None
         self._window.destroy()
         self._window = None
+        save_search_cache()
+        save_metrics_cache()
+        release_material_registry()
+        release_bbox_service()
+        release_area_layers()
+        asyncio.ensure_future(close_session())
@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import math
+from .token_budget import count_tokens
+
+def _words(text: str) -> set:
+    # Lowercase words with a trailing plural "s" removed, "Offices_2" -> {"office"}
+    words = set()
+    for word in re.findall(r"[a-z]+", text.lower()):
+        if len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+class FewShotIndex:
+    # Inverted index from name and keyword words to examples. An example is a dict with
+    # area_name, length, width, keywords, user and assistant entries.
+    def __init__(self, examples: list) -> None:
+        self.examples = examples
+        self._tokens = [count_tokens(example["user"]) + count_tokens(example["assistant"]) for example in examples]
+        self._index = {}
+        for i, example in enumerate(examples):
+            for word in _words(example["area_name"] + " " + example.get("keywords", "")):
+                self._index.setdefault(word, set()).add(i)
+
+    def select(self, area_name: str, length: float, width: float) -> dict:
+        words = _words(area_name)
+        candidates = set()
+        for word in words:
+            candidates |= self._index.get(word, set())
+        # Without any shared words every example is a candidate and size and length decide
+        if len(candidates) == 0:
+            candidates = set(range(len(self.examples)))
+
+        def score(i):
+            example = self.examples[i]
+            name_score = len(words & _words(example["area_name"] + " " + example.get("keywords", "")))
+            size_score = 1.0 / (1.0 + abs(math.log(max(length * width, 1.0) / (example["length"] * example["width"]))))
+            # Shorter examples win ties, every token sent costs latency
+            return (name_score, round(size_score, 1), -self._tokens[i])
+
+        return self.examples[max(candidates, key=score)]
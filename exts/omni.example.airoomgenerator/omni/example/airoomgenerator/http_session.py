@@ -0,0 +1,60 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import aiohttp
+
+# One connection pool for the lifetime of the extension, so back to back generations
+# reuse the same TCP/TLS connections instead of paying the handshake every time.
+_session = None
+_session_config = {
+    "keepalive_timeout": 60.0,
+    "limit": 100,
+    "limit_per_host": 10,
+    "dns_cache_ttl": 300,
+    "connect_timeout": 10.0,
+    "total_timeout": 120.0,
+}
+
+def configure_session(**kwargs):
+    # Changes only apply to a session opened after this call
+    for key, value in kwargs.items():
+        if key not in _session_config:
+            raise KeyError(f"Unknown session option: {key}")
+        if value is not None:
+            _session_config[key] = value
+
+def open_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=int(_session_config["limit"]),
+            limit_per_host=int(_session_config["limit_per_host"]),
+            keepalive_timeout=float(_session_config["keepalive_timeout"]),
+            ttl_dns_cache=int(_session_config["dns_cache_ttl"]))
+        timeout = aiohttp.ClientTimeout(
+            total=float(_session_config["total_timeout"]),
+            connect=float(_session_config["connect_timeout"]))
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return _session
+
+def get_session() -> aiohttp.ClientSession:
+    # Lazily (re)opens the pool if the extension did not open it or it was closed
+    return open_session()
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
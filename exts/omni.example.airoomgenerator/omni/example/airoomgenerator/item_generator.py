@@ -13,73 +13,136 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from pxr import Usd, Sdf, Gf
-from .utils import scale_object_if_needed, apply_material_to_prim, create_prim, set_transformTRS_attrs
+import carb
+import omni.usd
+from pxr import Sdf, Gf, Usd, UsdGeom
+from .utils import create_preset_material
+from .materials import MaterialPresets
+from .material_registry import get_material_registry
+from .tracing import get_tracer
+from .asset_metrics import get_asset_metrics, measure_asset, save_metrics_cache
+from .cache import make_cache_key
+from .area_layers import get_area_layers, AreaLayers
+from .authoring import (define_ancestors, author_greybox, author_greybox_instancer, author_asset, get_item_name,
+                        get_item_key, get_item_keys, set_item_key, remove_item, get_scale_for_metrics, get_asset_path,
+                        GREYBOX_INSTANCER)
 
-def place_deepsearch_results(gpt_results, query_result, root_prim_path):
-    index = 0
-    for item in query_result:
-        item_name = item[0]
-        item_path = item[1]
-        # Define Prim          
-        prim_parent_path = root_prim_path + item_name.replace(" ", "_")
-        prim_path = prim_parent_path + "/" + item_name.replace(" ", "_")
+def get_stage_area_layers() -> AreaLayers:
+    max_candidates = carb.settings.get_settings().get_as_int("/exts/omni.example.airoomgenerator/area_layers/max_candidates")
+    return get_area_layers(omni.usd.get_context().get_stage(), max_candidates)
 
-        parent_prim = create_prim(prim_parent_path)
-        next_prim = create_prim(prim_path)
+def use_area_layers() -> bool:
+    return carb.settings.get_settings().get_as_bool("/exts/omni.example.airoomgenerator/area_layers/enabled")
 
-        # Add reference to USD Asset
-        references: Usd.references = next_prim.GetReferences()
-        
-        # TODO: The query results should returnt he full path of the prim
-        references.AddReference(
-            assetPath="omniverse://ov-simready" + item_path)
-
-        # Add reference for future search refinement 
-        config = next_prim.CreateAttribute("DeepSearch:Query", Sdf.ValueTypeNames.String)
-        config.Set(item_name)
-        
-        # HACK: All "GetAttribute" calls should need to check if the attribute exists
-        # translate prim
-        next_object = gpt_results[index]
-        index = index + 1
-        x = next_object['X']
-        y = next_object['Y']
-        z = next_object['Z']
+def get_area_layer(area_path: str):
+    # The layer holding the area's active result, None when items go to the stage's edit target
+    if area_path == "" or not use_area_layers():
+        return None
+    return get_stage_area_layers().get_active_layer(area_path)
 
-        set_transformTRS_attrs(parent_prim, Gf.Vec3d(x,y,z), Gf.Vec3d(0,-90,-90), Gf.Vec3d(1.0,1.0,1.0))
-        scale_object_if_needed(prim_parent_path)
+def export_area_layers() -> None:
+    # Writes the results generated before the stage had a file next to it
+    if use_area_layers():
+        get_stage_area_layers().export_anonymous()
 
-def place_greyboxes(gpt_results, root_prim_path):
-    index = 0
-    for item in gpt_results:
-        # Define Prim          
-        prim_parent_path = root_prim_path + item['object_name'].replace(" ", "_")
-        prim_path = prim_parent_path + "/" + item['object_name'].replace(" ", "_")
+def save_area_layer(layer) -> None:
+    # Anonymous results live in memory, results next to a saved stage are written after each generation
+    if layer is not None and not layer.anonymous and layer.dirty:
+        layer.Save()
 
-        # Define Dimensions and material
-        length = item['Length']/100
-        width = item['Width']/100
-        height = item['Height']/100
-        x = item['X']
-        y = item['Y']+height*100*.5 #shift bottom of object to y=0
-        z = item['Z']
-        material = item['Material']
+def use_greybox_instancer() -> bool:
+    return carb.settings.get_settings().get_as_bool("/exts/omni.example.airoomgenerator/greybox/use_instancer")
 
-        # Create Prim
-        parent_prim = create_prim(prim_parent_path)
-        set_transformTRS_attrs(parent_prim)
-        prim = create_prim(prim_path, 'Cube')
-        set_transformTRS_attrs(prim, translate=Gf.Vec3d(x,y,z), scale=Gf.Vec3d(length, height, width))
-        prim.GetAttribute('extent').Set([(-50.0, -50.0, -50.0), (50.0, 50.0, 50.0)])
-        prim.GetAttribute('size').Set(100)
+def place_items(gpt_results, query_result, root_prim_path, remove_missing: bool = True, layer=None):
+    # Reconciles the items under root_prim_path with gpt_results, query_result holds the search result of each
+    # object or None for a greybox. Items are matched by name and only rewritten when their key (material,
+    # transform and asset) changed, so the cost follows the number of changed objects. With remove_missing,
+    # items that are no longer listed are removed. Instanced greyboxes are one prim, rewritten as a whole.
+    # Items are authored into layer, the area's layer, or the stage's edit target when there is none.
+    stage = omni.usd.get_context().get_stage()
+    if layer is None:
+        layer = stage.GetEditTarget().GetLayer()
+    define_ancestors(stage, layer, root_prim_path)
+    use_instancer = use_greybox_instancer()
+    existing = get_item_keys(stage, root_prim_path)
+    meters_per_unit = UsdGeom.GetStageMetersPerUnit(stage)
 
-        index = index + 1
-
-        # Add Attribute and Material
-        attr = prim.CreateAttribute("object_name", Sdf.ValueTypeNames.String)
-        attr.Set(item['object_name'])
-        apply_material_to_prim(material, prim_path)
+    wanted = {}
+    instanced = []
+    for next_object, item in zip(gpt_results, query_result):
+        if item is None and use_instancer:
+            instanced.append(next_object)
+            continue
+        # TODO: The query results should returnt he full path of the prim
+        asset_path = get_asset_path(item[1]) if item is not None else None
+        wanted[get_item_name(next_object['object_name'])] = (next_object, asset_path, get_item_key(next_object, asset_path))
+    instancer_key = make_cache_key([get_item_key(item) for item in instanced])
 
+    placed = []
+    unmeasured = []
+    changed = 0
+    removed = 0
+    # All specs go in one change block so the stage recomposes and notifies Hydra once per generation
+    with Sdf.ChangeBlock():
+        if remove_missing:
+            for name in existing:
+                if name not in wanted and not (name == GREYBOX_INSTANCER and existing[name] == instancer_key):
+                    remove_item(layer, root_prim_path + name)
+                    removed += 1
+        for name, (next_object, asset_path, key) in wanted.items():
+            if existing.get(name, None) == key:
+                continue
+            remove_item(layer, root_prim_path + name)
+            changed += 1
+            if asset_path is None:
+                prim_path = author_greybox(layer, next_object, root_prim_path)
+                placed.append((next_object['Material'], prim_path))
+            else:
+                # The extents of an asset are measured once and cached, after that the scale is known before it loads
+                metrics = get_asset_metrics(asset_path)
+                scale = 1.0 if metrics is None else get_scale_for_metrics(metrics, meters_per_unit)
+                prim_parent_path, prim_path = author_asset(
+                    layer, next_object, next_object['object_name'], asset_path, root_prim_path, scale)
+                if metrics is None:
+                    unmeasured.append((asset_path, prim_parent_path, prim_path))
+            set_item_key(layer, root_prim_path + name, key)
+        if len(instanced) > 0:
+            # A full list replaces the instances, streamed objects are added to them
+            if remove_missing and existing.get(GREYBOX_INSTANCER, None) != instancer_key:
+                remove_item(layer, root_prim_path + GREYBOX_INSTANCER)
+                placed.extend(author_greybox_instancer(layer, instanced, root_prim_path))
+                set_item_key(layer, root_prim_path + GREYBOX_INSTANCER, instancer_key)
+                changed += len(instanced)
+            elif not remove_missing:
+                placed.extend(author_greybox_instancer(layer, instanced, root_prim_path))
+                # The instances no longer match any list, the next full list rewrites them
+                set_item_key(layer, root_prim_path + GREYBOX_INSTANCER, "")
+                changed += len(instanced)
 
+    # Assets seen for the first time can only be measured once they are composed
+    with Usd.EditContext(stage, Usd.EditTarget(layer)):
+        for asset_path, prim_parent_path, prim_path in unmeasured:
+            metrics = get_asset_metrics(asset_path)
+            if metrics is None:
+                metrics = measure_asset(asset_path, stage.GetPrimAtPath(prim_path))
+            if metrics is None:
+                # Not loaded yet, it is measured again by the next generation that places it
+                continue
+            scale = get_scale_for_metrics(metrics, meters_per_unit)
+            if scale != 1.0:
+                stage.GetPrimAtPath(prim_parent_path).GetAttribute('xformOp:scale').Set(Gf.Vec3f(scale, scale, scale))
+    save_metrics_cache()
+    apply_materials(placed, layer)
+    carb.log_info(f"{root_prim_path}: {changed} items authored, {removed} removed, {len(gpt_results) - changed} unchanged")
 
+def apply_materials(placed, layer=None):
+    # placed is a list of (material, prim_path). Only preset materials are used, like apply_material_to_prim;
+    # the ones the stage does not have yet are created through the Kit command, then all prims are bound at once.
+    # Materials are shared between areas, so they are created in the edit target and only bindings go in layer.
+    placed = [(material, prim_path) for material, prim_path in placed if material in MaterialPresets]
+    if len(placed) == 0:
+        return
+    registry = get_material_registry(omni.usd.get_context().get_stage())
+    with get_tracer().span("material_binding", prims=len(placed)):
+        registry.ensure({material for material, _ in placed}, create_preset_material)
+        registry.bind(placed, layer)
@@ -0,0 +1,127 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import numpy as np
+
+# Overlaps below this many centimetres are objects touching after a push, not collisions
+_TOLERANCE = 1e-3
+
+# Post-processing of the area_objects_list ChatGPT returns: objects are kept inside the area and pushed apart
+# where their footprints overlap. Footprints are Length on X and Width on Z around (X, Z), like the greyboxes.
+
+def _to_arrays(objects):
+    data = np.array([[item['X'], item['Y'], item['Z'], item['Length'], item['Width'], item['Height']] for item in objects],
+                    dtype=np.float64).reshape(-1, 6)
+    centers = data[:, [0, 2]]
+    half_sizes = data[:, [3, 4]] * 0.5
+    # Objects only collide when they are also at the same height, a box on a shelf is not in the shelf's way
+    heights = np.column_stack((data[:, 1], data[:, 1] + data[:, 5]))
+    return centers, half_sizes, heights
+
+def _clamp(centers, half_sizes, area_half):
+    # Objects larger than the area are centered on it
+    low = -area_half + half_sizes
+    high = area_half - half_sizes
+    return np.where(low <= high, np.clip(centers, low, np.maximum(low, high)), 0.0)
+
+def find_overlaps(centers, half_sizes, heights, gap: float = 0.0):
+    # Returns (first, second) index arrays of the overlapping pairs. Objects are bucketed into a uniform grid
+    # and only objects sharing a cell are compared, so the cost follows the number of neighbours, not n squared.
+    count = len(centers)
+    if count < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    cell = max(float(np.median(half_sizes)) * 2.0 + gap, 1.0)
+    low = np.floor((centers - half_sizes - gap * 0.5) / cell).astype(np.int64)
+    high = np.floor((centers + half_sizes + gap * 0.5) / cell).astype(np.int64)
+    spans = high - low + 1
+
+    # One entry per (object, cell it touches)
+    per_object = spans[:, 0] * spans[:, 1]
+    owners = np.repeat(np.arange(count), per_object)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(per_object) - per_object, per_object)
+    cell_x = low[owners, 0] + offsets % spans[owners, 0]
+    cell_z = low[owners, 1] + offsets // spans[owners, 0]
+    keys = (cell_x - cell_x.min()) * (int(cell_z.max() - cell_z.min()) + 1) + (cell_z - cell_z.min())
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    owners = owners[order]
+
+    # Entries of a cell are adjacent after sorting, pair each one with the ones after it in the same cell
+    first = []
+    second = []
+    distance = 1
+    while distance < len(keys):
+        same = keys[distance:] == keys[:-distance]
+        if not same.any():
+            break
+        first.append(owners[:-distance][same])
+        second.append(owners[distance:][same])
+        distance += 1
+    if len(first) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    first = np.concatenate(first)
+    second = np.concatenate(second)
+    # Objects spanning several cells meet more than once
+    pairs = np.unique(np.minimum(first, second) * count + np.maximum(first, second))
+    first = pairs // count
+    second = pairs % count
+
+    distance = np.abs(centers[first] - centers[second])
+    overlap = half_sizes[first] + half_sizes[second] + gap - distance
+    stacked = (heights[first, 0] < heights[second, 1]) & (heights[second, 0] < heights[first, 1])
+    colliding = (overlap[:, 0] > _TOLERANCE) & (overlap[:, 1] > _TOLERANCE) & stacked
+    return first[colliding], second[colliding]
+
+def resolve_layout(objects, area_length: float, area_width: float, max_iterations: int = 256, gap: float = 0.0) -> list:
+    # Returns copies of objects clamped to the area and with overlapping objects pushed apart along the
+    # axis where they overlap least. Each pass moves both objects of a pair half the overlap, passes run until
+    # nothing overlaps. max_iterations only stops areas too full to fit their objects, what still overlaps
+    # then is left as it is.
+    if len(objects) == 0:
+        return []
+    centers, half_sizes, heights = _to_arrays(objects)
+    area_half = np.array([area_length, area_width], dtype=np.float64) * 0.5
+    centers = _clamp(centers, half_sizes, area_half)
+
+    for _ in range(max_iterations):
+        first, second = find_overlaps(centers, half_sizes, heights, gap)
+        if len(first) == 0:
+            break
+        difference = centers[first] - centers[second]
+        overlap = half_sizes[first] + half_sizes[second] + gap - np.abs(difference)
+        axis = np.argmin(overlap, axis=1)
+        rows = np.arange(len(first))
+        # Objects at the same spot are split by index so they do not stay on top of each other
+        direction = np.sign(difference[rows, axis])
+        direction[direction == 0] = np.where(first[direction == 0] < second[direction == 0], -1.0, 1.0)
+        push = np.zeros((len(first), 2))
+        push[rows, axis] = overlap[rows, axis] * 0.5 * direction
+        moves = np.zeros_like(centers)
+        np.add.at(moves, first, push)
+        np.add.at(moves, second, -push)
+        centers = _clamp(centers + moves, half_sizes, area_half)
+
+    result = []
+    for item, center in zip(objects, centers):
+        item = dict(item)
+        item['X'] = float(center[0])
+        item['Z'] = float(center[1])
+        result.append(item)
+    return result
+
+def count_overlaps(objects, gap: float = 0.0) -> int:
+    centers, half_sizes, heights = _to_arrays(objects)
+    return len(find_overlaps(centers, half_sizes, heights, gap)[0])
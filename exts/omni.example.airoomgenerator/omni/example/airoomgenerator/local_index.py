@@ -0,0 +1,162 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import re
+import json
+import math
+import time
+
+USD_EXTENSIONS = (".usd", ".usda", ".usdc", ".usdz")
+
+# Words in the file name count for more than words in the folders above it
+_NAME_WEIGHT = 2.0
+_FOLDER_WEIGHT = 1.0
+
+def tokenize(text: str) -> list:
+    # "SM_WoodenPallet_01" -> ["sm", "wooden", "pallet"]
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    tokens = []
+    for word in re.split(r"[^A-Za-z0-9]+", text.lower()):
+        if word == "" or word.isdigit():
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+class LocalAssetIndex:
+    # Inverted index over the USD files below root, answering name queries without a search service.
+    # refresh() only re-reads files that were added, changed or removed since the last refresh.
+    def __init__(self, root: str, index_path: str = None) -> None:
+        self.root = os.path.normpath(root)
+        self.index_path = index_path
+        self.last_refresh = 0.0
+        self._files = {}
+        self._postings = {}
+        self.load()
+
+    def __len__(self):
+        return len(self._files)
+
+    def refresh(self) -> tuple:
+        # Returns the number of (added, updated, removed) files
+        seen = set()
+        added = 0
+        updated = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if not name.lower().endswith(USD_EXTENSIONS):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                entry = self._files.get(path, None)
+                if entry is not None and entry["mtime"] == mtime:
+                    continue
+                if entry is None:
+                    added += 1
+                else:
+                    updated += 1
+                    self._remove(path)
+                self._add(path, mtime)
+
+        removed = [path for path in self._files if path not in seen]
+        for path in removed:
+            self._remove(path)
+        self.last_refresh = time.time()
+        if added or updated or removed:
+            self.save()
+        return added, updated, len(removed)
+
+    def search(self, query: str, limit: int = 10) -> list:
+        # Returns up to limit (path, score) pairs, best first
+        tokens = set(tokenize(query))
+        if len(tokens) == 0 or len(self._files) == 0:
+            return []
+        scores = {}
+        for token in tokens:
+            postings = self._postings.get(token, None)
+            if postings is None:
+                continue
+            # Rare words say more about a match than common ones
+            idf = math.log(1.0 + len(self._files) / len(postings))
+            for path in postings:
+                scores[path] = scores.get(path, 0.0) + idf * self._files[path]["weights"][token]
+        for path in scores:
+            # Prefer files whose name is mostly made of the query words
+            scores[path] /= math.sqrt(len(self._files[path]["weights"]))
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], len(item[0])))
+        return ranked[:limit]
+
+    def query_first(self, query: str):
+        # Same result shape as deep_search._query_first
+        results = self.search(query, 1)
+        if len(results) == 0:
+            return None
+        return (query, results[0][0])
+
+    def load(self) -> None:
+        if self.index_path is None or not os.path.isfile(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("root") != self.root:
+            return
+        self.last_refresh = data.get("last_refresh", 0.0)
+        for path, entry in data.get("files", {}).items():
+            self._files[path] = entry
+            for token in entry["weights"]:
+                self._postings.setdefault(token, set()).add(path)
+
+    def save(self) -> None:
+        if self.index_path is None:
+            return
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"root": self.root, "last_refresh": self.last_refresh, "files": self._files}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _add(self, path: str, mtime: float) -> None:
+        relative = os.path.relpath(path, self.root)
+        folders, name = os.path.split(relative)
+        weights = {}
+        for token in tokenize(folders):
+            weights[token] = max(weights.get(token, 0.0), _FOLDER_WEIGHT)
+        for token in tokenize(os.path.splitext(name)[0]):
+            weights[token] = max(weights.get(token, 0.0), _NAME_WEIGHT)
+        self._files[path] = {"mtime": mtime, "weights": weights}
+        for token in weights:
+            self._postings.setdefault(token, set()).add(path)
+
+    def _remove(self, path: str) -> None:
+        entry = self._files.pop(path, None)
+        if entry is None:
+            return
+        for token in entry["weights"]:
+            postings = self._postings.get(token, None)
+            if postings is not None:
+                postings.discard(path)
+                if len(postings) == 0:
+                    del self._postings[token]
@@ -0,0 +1,86 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from pxr import Sdf, Tf, Usd, UsdShade
+from .authoring import bind_materials
+from .stage_registry import PerStageRegistry
+
+LOOKS_PATH = "/World/Looks"
+
+class MaterialRegistry:
+    # Material prims under /World/Looks by name. Rescanned only after a change notice touches the Looks scope,
+    # so binding a generation does not look every material up on the stage.
+    def __init__(self, stage, looks_path: str = LOOKS_PATH) -> None:
+        self.stage = stage
+        self.looks_path = Sdf.Path(looks_path)
+        self._materials = None
+        self._listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_objects_changed, stage)
+
+    def revoke(self) -> None:
+        if self._listener is not None:
+            self._listener.Revoke()
+            self._listener = None
+
+    def _on_objects_changed(self, notice, sender) -> None:
+        if self._materials is None:
+            return
+        for path in notice.GetResyncedPaths():
+            if path.HasPrefix(self.looks_path) or self.looks_path.HasPrefix(path):
+                self._materials = None
+                return
+
+    def _scan(self) -> dict:
+        materials = {}
+        looks = self.stage.GetPrimAtPath(self.looks_path)
+        if looks.IsValid():
+            for child in looks.GetChildren():
+                if child.IsA(UsdShade.Material):
+                    materials[child.GetName()] = child.GetPath()
+        return materials
+
+    def get(self, name: str):
+        # Path of the material prim, None when the stage has no material of that name
+        if self._materials is None:
+            self._materials = self._scan()
+        return self._materials.get(name, None)
+
+    def ensure(self, names, create_material) -> None:
+        # Calls create_material(name, path) for each name that has no material prim yet
+        for name in names:
+            if self.get(name) is None:
+                create_material(name, str(self.looks_path.AppendChild(name)))
+
+    def bind(self, bindings, layer=None) -> int:
+        # bindings is a list of (material name, prim path), all bound in one change block in layer, the
+        # stage's edit target by default. Names without a material prim are skipped, returns the number bound.
+        resolved = []
+        for name, prim_path in bindings:
+            material_path = self.get(name)
+            if material_path is not None:
+                resolved.append((prim_path, material_path))
+        if layer is None:
+            layer = self.stage.GetEditTarget().GetLayer()
+        with Sdf.ChangeBlock():
+            bind_materials(layer, resolved)
+        return len(resolved)
+
+_registries = PerStageRegistry(MaterialRegistry)
+
+def get_material_registry(stage) -> MaterialRegistry:
+    return _registries.get(stage)
+
+def release_material_registry() -> None:
+    _registries.release()
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from .compact_format import to_compact
+
 system_input='''You are an area generator expert. Given an area of a certain size, you can generate a list of items that are appropriate to that area, in the right place, and with a representative material.
 
 You operate in a 3D Space. You work in a X,Y,Z coordinate system. X denotes width, Y denotes height, Z denotes depth. 0.0,0.0,0.0 is the default space origin.
@@ -49,6 +51,26 @@ Also keep in mind that the objects should be disposed all over the area in respe
 Remember, you only generate JSON code, nothing else. It's very important.
 '''
 
+
+# Same instructions for the compact output format, the object keys are sent once instead of for every object
+system_input_compact = system_input.replace('''You answer by only generating JSON files that contain the following information:
+
+- area_name: name of the area
+- X: coordinate of the area on X axis
+- Y: coordinate of the area on Y axis
+- Z: coordinate of the area on Z axis
+- area_size_X: dimension in cm of the area on X axis
+- area_size_Z: dimension in cm of the area on Z axis
+- area_objects_list: list of all the objects in the area
+
+For each object you need to store:''', '''You answer by only generating compact JSON files that contain the following information:
+
+- area_name: name of the area
+- columns: always ["object_name", "X", "Y", "Z", "Length", "Width", "Height", "Material"]
+- rows: one array per object in the area, holding the values of that object in the order of columns
+
+For each object you need to store:''')
+
 user_input="Warehouse, 1000x1000, origin at (0.0,0.0,0.0), generate a list of appropriate items in the correct places. Generate warehouse objects"
 
 assistant_input='''{
@@ -123,4 +145,81 @@ assistant_input='''{
         }
     ]
 }'''
-    
\ No newline at end of file
+    
+
+# Short examples, one of them is picked per request by similarity to the area being generated
+few_shot_examples = [
+    {
+        "area_name": "Warehouse",
+        "length": 1000,
+        "width": 1000,
+        "keywords": "warehouse storage logistics depot pallet rack forklift industrial",
+        "user": user_input,
+        "assistant": assistant_input
+    },
+    {
+        "area_name": "Office",
+        "length": 600,
+        "width": 400,
+        "keywords": "office workspace desk meeting study cubicle",
+        "user": "Office, 600x400, origin at (0.0,0.0,0.0), generate a list of appropriate items in the correct places. Generate office furniture",
+        "assistant": '''{"area_name": "Office", "X": 0.0, "Y": 0.0, "Z": 0.0, "area_size_X": 600, "area_size_Z": 400, "area_objects_list": [
+{"object_name": "Wooden_Desk_1", "X": -150, "Y": 0.0, "Z": -100, "Length": 160, "Width": 80, "Height": 75, "Material": "Oak"},
+{"object_name": "Black_Office_Chair_1", "X": -150, "Y": 0.0, "Z": -40, "Length": 60, "Width": 60, "Height": 110, "Material": "Leather_Black"},
+{"object_name": "Metal_Filing_Cabinet_1", "X": 250, "Y": 0.0, "Z": -170, "Length": 50, "Width": 60, "Height": 130, "Material": "Steel_Carbon"}
+]}'''
+    },
+    {
+        "area_name": "Reception",
+        "length": 500,
+        "width": 500,
+        "keywords": "reception lobby lounge waiting living entrance hall",
+        "user": "Reception, 500x500, origin at (0.0,0.0,0.0), generate a list of appropriate items in the correct places. Generate seating for visitors",
+        "assistant": '''{"area_name": "Reception", "X": 0.0, "Y": 0.0, "Z": 0.0, "area_size_X": 500, "area_size_Z": 500, "area_objects_list": [
+{"object_name": "Reception_Counter_1", "X": 0, "Y": 0.0, "Z": -200, "Length": 300, "Width": 70, "Height": 110, "Material": "Mahogany"},
+{"object_name": "Comfortable_Sofa_1", "X": -120, "Y": 0.0, "Z": 150, "Length": 200, "Width": 90, "Height": 80, "Material": "Leather_Brown"},
+{"object_name": "Glass_Coffee_Table_1", "X": -120, "Y": 0.0, "Z": 60, "Length": 100, "Width": 60, "Height": 45, "Material": "Glazed_Glass"}
+]}'''
+    },
+    {
+        "area_name": "Kitchen",
+        "length": 400,
+        "width": 300,
+        "keywords": "kitchen cafeteria canteen pantry dining break room",
+        "user": "Kitchen, 400x300, origin at (0.0,0.0,0.0), generate a list of appropriate items in the correct places. Generate kitchen items",
+        "assistant": '''{"area_name": "Kitchen", "X": 0.0, "Y": 0.0, "Z": 0.0, "area_size_X": 400, "area_size_Z": 300, "area_objects_list": [
+{"object_name": "Steel_Counter_1", "X": 0, "Y": 0.0, "Z": -120, "Length": 300, "Width": 60, "Height": 90, "Material": "Steel_Stainless"},
+{"object_name": "Tall_Refrigerator_1", "X": 170, "Y": 0.0, "Z": -110, "Length": 60, "Width": 70, "Height": 180, "Material": "Aluminum_Cast"},
+{"object_name": "Birch_Dining_Table_1", "X": 0, "Y": 0.0, "Z": 60, "Length": 140, "Width": 80, "Height": 75, "Material": "Birch"}
+]}'''
+    },
+    {
+        "area_name": "Bedroom",
+        "length": 400,
+        "width": 400,
+        "keywords": "bedroom dorm hotel room sleeping guest",
+        "user": "Bedroom, 400x400, origin at (0.0,0.0,0.0), generate a list of appropriate items in the correct places. Generate bedroom furniture",
+        "assistant": '''{"area_name": "Bedroom", "X": 0.0, "Y": 0.0, "Z": 0.0, "area_size_X": 400, "area_size_Z": 400, "area_objects_list": [
+{"object_name": "Double_Bed_1", "X": 0, "Y": 0.0, "Z": -80, "Length": 160, "Width": 200, "Height": 50, "Material": "Linen_White"},
+{"object_name": "Wooden_Nightstand_1", "X": 120, "Y": 0.0, "Z": -160, "Length": 50, "Width": 40, "Height": 55, "Material": "Oak"},
+{"object_name": "Tall_Wardrobe_1", "X": -150, "Y": 0.0, "Z": 150, "Length": 120, "Width": 60, "Height": 200, "Material": "MDF"}
+]}'''
+    }
+]
+
+def build_area_prompt(area_name: str, length, width, prompt: str) -> str:
+    # The user prompt for an area, area_name with spaces and the size in centimetres
+    return area_name + ", " + str(length) + "x" + str(width) + ", origin at (0.0, 0.0, 0.0), generate a list of appropriate items in the correct places. " + prompt
+
+def build_messages(prompt: str, example: dict = None, compact: bool = False) -> list:
+    # example is the few-shot pair to send, defaults to the warehouse example
+    example_user = example["user"] if example is not None else user_input
+    example_assistant = example["assistant"] if example is not None else assistant_input
+    if compact:
+        example_assistant = to_compact(example_assistant)
+    return [
+        {"role": "system", "content": system_input_compact if compact else system_input},
+        {"role": "user", "content": example_user},
+        {"role": "assistant", "content": example_assistant},
+        {"role": "user", "content": prompt}
+    ]
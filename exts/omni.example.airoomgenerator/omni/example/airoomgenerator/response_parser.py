@@ -0,0 +1,156 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import json
+from .compact_format import COLUMNS, parse_compact
+
+_CODE_FENCE = re.compile(r"```[a-zA-Z]*\s*(.*?)(?:```|$)", re.S)
+_NUMBER_FIELDS = ("X", "Y", "Z", "Length", "Width", "Height")
+
+class ObjectStreamParser:
+    # Incrementally scans a JSON document as it arrives and returns every entry of the list stored
+    # under list_key as soon as that entry is complete, without waiting for the rest of the document.
+    # With columns given, list entries (rows of the compact format) are returned as dicts.
+    def __init__(self, list_key: str = "area_objects_list", columns: list = None) -> None:
+        self.list_key = list_key
+        self.columns = columns
+        self.done = False
+        self._buffer = ""
+        self._pos = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start = -1
+
+    def feed(self, chunk: str) -> list:
+        self._buffer += chunk
+        items = []
+        if self.done:
+            return items
+        if self._pos < 0 and not self._find_list_start():
+            return items
+
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c == "{" or c == "[":
+                if self._depth == 0:
+                    self._item_start = i
+                self._depth += 1
+            elif c == "}" or c == "]":
+                if self._depth == 0:
+                    # End of the list itself
+                    self.done = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        item = json.loads(buffer[self._item_start:i + 1])
+                    except ValueError:
+                        item = None
+                    if isinstance(item, list) and self.columns is not None:
+                        item = dict(zip(self.columns, item))
+                    if item is not None:
+                        items.append(item)
+                    self._item_start = -1
+            i += 1
+        self._pos = i
+        return items
+
+    def _find_list_start(self) -> bool:
+        key_index = self._buffer.find('"' + self.list_key + '"')
+        if key_index < 0:
+            return False
+        bracket_index = self._buffer.find("[", key_index)
+        if bracket_index < 0:
+            return False
+        self._pos = bracket_index + 1
+        return True
+
+def extract_json_text(text: str) -> str:
+    # Drops code fences and any prose around the JSON document, a truncated document is kept as is
+    match = _CODE_FENCE.search(text)
+    if match is not None:
+        text = match.group(1)
+    start = text.find("{")
+    if start < 0:
+        return text.strip()
+    end = text.rfind("}")
+    if end < start:
+        return text[start:]
+    return text[start:end + 1]
+
+def validate_object(item) -> dict:
+    # Returns the object with numeric fields as floats, or None if it cannot be placed
+    if isinstance(item, list):
+        item = dict(zip(COLUMNS, item))
+    if not isinstance(item, dict):
+        return None
+    name = item.get("object_name")
+    if not isinstance(name, str) or name.strip() == "":
+        return None
+    result = dict(item)
+    result["object_name"] = name.strip()
+    for field in _NUMBER_FIELDS:
+        value = item.get(field, 0.0 if field == "Y" else None)
+        if isinstance(value, bool):
+            return None
+        try:
+            result[field] = float(value)
+        except (TypeError, ValueError):
+            return None
+    material = item.get("Material")
+    result["Material"] = material if isinstance(material, str) else ""
+    return result
+
+def parse_objects(text: str, compact: bool = False):
+    # Tolerant parse of a ChatGPT response. Returns (objects, complete) where complete is False when
+    # the JSON had to be recovered or malformed objects were dropped, objects is None if nothing was usable.
+    # Code fences and prose around the JSON are not a defect, and an empty object list is a valid answer.
+    body = extract_json_text(text)
+    recovered = False
+    try:
+        data = json.loads(body)
+        items = parse_compact(data) if compact else data["area_objects_list"]
+        if not isinstance(items, list):
+            raise TypeError("object list is not a list")
+    except (ValueError, KeyError, TypeError):
+        # Salvage every complete object, which also repairs arrays cut off by the token limit
+        if compact:
+            items = ObjectStreamParser("rows", COLUMNS).feed(body)
+        else:
+            items = ObjectStreamParser().feed(body)
+        recovered = True
+
+    objects = []
+    for item in items:
+        valid = validate_object(item)
+        if valid is not None:
+            objects.append(valid)
+    if len(objects) == 0 and (recovered or len(items) > 0):
+        return None, False
+    return objects, not recovered and len(objects) == len(items)
@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import random
+import asyncio
+from collections import deque
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+class RetryableError(Exception):
+    # Raised by an attempt that is worth repeating, retry_after is the server requested delay in seconds
+    def __init__(self, message: str, retry_after: float = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def parse_retry_after(value) -> float:
+    # Only the delay-seconds form is used by the OpenAI API, HTTP dates are ignored
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+def percentile(ordered: list, percent: float) -> float:
+    # Nearest rank percentile of an already sorted, non-empty list
+    index = min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+class LatencyTracker:
+    # Keeps the most recent request latencies to decide when a request is slow enough to hedge
+    def __init__(self, max_samples: int = 100) -> None:
+        self._samples = deque(maxlen=max_samples)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, percent: float, min_samples: int = 1) -> float:
+        if len(self._samples) < max(1, min_samples):
+            return None
+        return percentile(sorted(self._samples), percent)
+
+async def call_with_retries(make_attempt, max_retries: int = 3, base_delay: float = 0.5,
+                            max_delay: float = 20.0, deadline: float = None):
+    # make_attempt is a coroutine function. deadline is a time.monotonic() value after which
+    # no new attempt is started.
+    attempt = 0
+    while True:
+        try:
+            return await make_attempt()
+        except RetryableError as e:
+            if attempt >= max_retries:
+                raise
+            delay = e.retry_after if e.retry_after is not None else backoff_delay(attempt, base_delay, max_delay)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+
+async def call_hedged(make_attempt, hedge_after: float = None):
+    # Starts a second attempt when the first one has not finished after hedge_after seconds and
+    # returns whichever succeeds first. The slower attempt is cancelled.
+    tasks = [asyncio.ensure_future(make_attempt())]
+    try:
+        if hedge_after is None:
+            return await tasks[0]
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            tasks.append(asyncio.ensure_future(make_attempt()))
+
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
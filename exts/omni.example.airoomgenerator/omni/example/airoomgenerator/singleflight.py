@@ -0,0 +1,41 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+class SingleFlight:
+    # Concurrent calls with the same key share one in-flight call instead of each making their own
+    def __init__(self) -> None:
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key: str, make_call):
+        # make_call is a coroutine function, only called when no call for key is in flight.
+        # Returns (result, shared) where shared is True when the result came from another caller's call.
+        future = self._calls.get(key, None)
+        shared = future is not None
+        if not shared:
+            future = asyncio.ensure_future(make_call())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        # Shielded so one caller giving up does not cancel the call for everyone else
+        result = await asyncio.shield(future)
+        return result, shared
+
+    def _forget(self, key: str, future) -> None:
+        if self._calls.get(key, None) is future:
+            del self._calls[key]
@@ -0,0 +1,34 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+class PerStageRegistry:
+    # Holds one object for the open stage, built by factory(stage, *args) and replaced when another stage is
+    # opened. Objects with a revoke() method, such as stage listeners, have it called when they are dropped.
+    def __init__(self, factory) -> None:
+        self._factory = factory
+        self._value = None
+
+    def get(self, stage, *args):
+        if self._value is None or self._value.stage != stage:
+            self.release()
+            self._value = self._factory(stage, *args)
+        return self._value
+
+    def release(self) -> None:
+        if self._value is not None:
+            revoke = getattr(self._value, "revoke", None)
+            if revoke is not None:
+                revoke()
+            self._value = None
@@ -52,6 +52,8 @@ Step 3: Generate
 - Select 'use Deepsearch' if you want to use the deepsearch functionality. (ENTERPRISE USERS ONLY)
     When deepsearch is false it will spawn in cubes that greybox the scene.
 - Hit Generate, after hitting generate it will start making the appropriate calls. Loading bar will be shown as api-calls are being made.
+    Generated items are written straight to the area's layer so only the changed ones are rewritten, which means a
+    generation can not be undone with Ctrl+Z. Use the '<' and '>' result buttons to go back to an earlier result.
 
 Step 4: More Rooms
 - To add another room you can repeat Steps 1-3. To regenerate a previous room just select it from the 'Current Room' in the dropdown menu.
@@ -1 +1,16 @@
-from .test_hello_world import *
\ No newline at end of file
+from .test_retry import *
+from .test_compact_format import *
+from .test_response_parser import *
+from .test_deep_search import *
+from .test_local_index import *
+from .test_batch import *
+from .test_cache import *
+from .test_rate_limiter import *
+from .test_singleflight import *
+from .test_layout import *
+from .test_place_items import *
+from .test_area_layers import *
+from .test_few_shot import *
+from .test_token_budget import *
+from .test_tracing import *
+from .test_stage_registry import *
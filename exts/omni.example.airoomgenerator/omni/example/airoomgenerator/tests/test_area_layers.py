@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import omni.kit.test
+from pxr import Sdf, Usd
+
+from omni.example.airoomgenerator.area_layers import AREA_KEY, AreaLayers
+
+AREA = "/World/Layout/Office"
+
+
+def add_item(layer, name):
+    Sdf.CreatePrimInLayer(layer, AREA + "/items/" + name).specifier = Sdf.SpecifierDef
+
+
+class TestAreaLayers(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.stage_path = os.path.join(self._dir, "room.usda")
+
+    async def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _item_names(self, stage):
+        items = stage.GetPrimAtPath(AREA + "/items")
+        return sorted(child.GetName() for child in items.GetAllChildren()) if items.IsValid() else []
+
+    async def test_candidates_copy_the_active_one(self):
+        stage = Usd.Stage.CreateInMemory()
+        area_layers = AreaLayers(stage)
+        self.assertIsNone(area_layers.get_active_layer(AREA))
+        first = area_layers.new_candidate(AREA)
+        add_item(first, "Desk")
+        second = area_layers.new_candidate(AREA)
+        add_item(second, "Chair")
+        self.assertEqual(first.customLayerData[AREA_KEY], AREA)
+        self.assertIs(area_layers.get_active_layer(AREA), second)
+        self.assertEqual(self._item_names(stage), ["Chair", "Desk"])
+        # Only the active candidate is attached
+        self.assertEqual(list(stage.GetRootLayer().subLayerPaths), [second.identifier])
+
+    async def test_select_switches_candidates(self):
+        stage = Usd.Stage.CreateInMemory()
+        area_layers = AreaLayers(stage)
+        add_item(area_layers.new_candidate(AREA), "Desk")
+        second = area_layers.new_candidate(AREA)
+        add_item(second, "Chair")
+        self.assertEqual(area_layers.describe(AREA), "Result 2 of 2")
+        area_layers.select(AREA, -1)
+        self.assertEqual(area_layers.describe(AREA), "Result 1 of 2")
+        self.assertEqual(self._item_names(stage), ["Desk"])
+        # Wraps around
+        area_layers.select(AREA, -1)
+        self.assertIs(area_layers.get_active_layer(AREA), second)
+        self.assertEqual(self._item_names(stage), ["Chair", "Desk"])
+        self.assertEqual(len(stage.GetRootLayer().subLayerPaths), 1)
+
+    async def test_discard_detaches_the_last_candidate(self):
+        stage = Usd.Stage.CreateInMemory()
+        area_layers = AreaLayers(stage)
+        add_item(area_layers.new_candidate(AREA), "Desk")
+        add_item(area_layers.new_candidate(AREA), "Chair")
+        area_layers.discard(AREA)
+        self.assertEqual(self._item_names(stage), ["Desk"])
+        area_layers.discard(AREA)
+        self.assertEqual(area_layers.describe(AREA), "No results")
+        self.assertEqual(list(stage.GetRootLayer().subLayerPaths), [])
+        self.assertEqual(self._item_names(stage), [])
+
+    async def test_oldest_candidates_are_dropped(self):
+        stage = Usd.Stage.CreateInMemory()
+        area_layers = AreaLayers(stage, max_candidates=2)
+        for name in ["A", "B", "C"]:
+            add_item(area_layers.new_candidate(AREA), name)
+        self.assertEqual(area_layers.describe(AREA), "Result 2 of 2")
+        area_layers.select(AREA, 1)
+        self.assertEqual(self._item_names(stage), ["A", "B"])
+
+    async def test_saved_stage_reuses_file_slots(self):
+        stage = Usd.Stage.CreateNew(self.stage_path)
+        area_layers = AreaLayers(stage, max_candidates=2)
+        for _ in range(5):
+            area_layers.new_candidate(AREA)
+        # The oldest candidate is dropped before a new one is made, so max_candidates files are enough
+        files = sorted(name for name in os.listdir(self._dir) if name != "room.usda")
+        self.assertEqual(files, ["room_Office_0.usda", "room_Office_1.usda"])
+        self.assertEqual(area_layers.describe(AREA), "Result 2 of 2")
+        # Attached relative to the stage
+        self.assertTrue(stage.GetRootLayer().subLayerPaths[0].startswith("./room_Office_"))
+
+    async def test_saved_results_are_reloaded(self):
+        stage = Usd.Stage.CreateNew(self.stage_path)
+        area_layers = AreaLayers(stage)
+        layer = area_layers.new_candidate(AREA)
+        add_item(layer, "Desk")
+        layer.Save()
+        stage.GetRootLayer().Save()
+        del area_layers, layer, stage
+
+        stage = Usd.Stage.Open(self.stage_path)
+        area_layers = AreaLayers(stage)
+        self.assertEqual(self._item_names(stage), ["Desk"])
+        self.assertEqual(area_layers.describe(AREA), "Result 1 of 1")
+        # A new generation starts from the reloaded result
+        add_item(area_layers.new_candidate(AREA), "Chair")
+        self.assertEqual(self._item_names(stage), ["Chair", "Desk"])
+
+    async def test_anonymous_results_are_exported_on_save(self):
+        stage = Usd.Stage.CreateInMemory()
+        area_layers = AreaLayers(stage)
+        add_item(area_layers.new_candidate(AREA), "Desk")
+        area_layers.export_anonymous()
+        self.assertTrue(area_layers.get_active_layer(AREA).anonymous)
+
+        # Save As of a new stage writes the root and opens the file
+        stage.GetRootLayer().Export(self.stage_path)
+        saved = Usd.Stage.Open(self.stage_path)
+        AreaLayers(saved).export_anonymous()
+        self.assertEqual(list(saved.GetRootLayer().subLayerPaths), ["./room_Office_0.usda"])
+        del saved
+        reopened = Usd.Stage.Open(self.stage_path, Usd.Stage.LoadAll)
+        self.assertEqual(self._item_names(reopened), ["Desk"])
@@ -0,0 +1,101 @@
+import os
+import json
+import asyncio
+import shutil
+import tempfile
+import omni.kit.test
+from pxr import Sdf, Usd
+
+from omni.example.airoomgenerator import batch
+from omni.example.airoomgenerator.batch import (ExampleBackend, NoSearch, generate_area, get_worker_limiter,
+                                                load_manifest, parse_args, write_area_file)
+from omni.example.airoomgenerator.area_layers import AREA_KEY
+from omni.example.airoomgenerator.authoring import GREYBOX_INSTANCER
+from omni.example.airoomgenerator.prompts import assistant_input
+
+
+class TestBatch(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.area = {"name": "Warehouse Area", "length": 1000.0, "width": 800.0, "prompt": "Pallets"}
+        self.objects = json.loads(assistant_input)["area_objects_list"]
+
+    async def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _options(self, *args):
+        return parse_args(["areas.json", "--out", self._dir, "--llm", "example", *args])
+
+    async def test_write_area_file(self):
+        path = os.path.join(self._dir, "Warehouse_Area.usda")
+        write_area_file(path, self.area, self.objects, [None] * len(self.objects))
+        self.assertFalse(os.path.exists(path[:-len(".usda")] + ".partial.usda"))
+        layer = Sdf.Layer.FindOrOpen(path)
+        self.assertEqual(layer.customLayerData[AREA_KEY], "/World/Layout/Warehouse_Area")
+        stage = Usd.Stage.Open(layer)
+        self.assertTrue(stage.GetPrimAtPath("/World/Layout/Warehouse_Area/Floor/Cube").IsValid())
+        items = stage.GetPrimAtPath("/World/Layout/Warehouse_Area/items")
+        self.assertEqual(len(items.GetChildren()), len(self.objects))
+        self.assertTrue(stage.GetPrimAtPath("/World/Looks").IsValid())
+
+    async def test_write_area_file_with_instancer(self):
+        path = os.path.join(self._dir, "Warehouse_Area.usda")
+        write_area_file(path, self.area, self.objects, [None] * len(self.objects), use_instancer=True)
+        stage = Usd.Stage.Open(path)
+        items = stage.GetPrimAtPath("/World/Layout/Warehouse_Area/items")
+        self.assertEqual([child.GetName() for child in items.GetChildren()], [GREYBOX_INSTANCER.strip("/")])
+        instancer = items.GetChildren()[0]
+        self.assertEqual(len(instancer.GetAttribute("positions").Get()), len(self.objects))
+
+    async def test_generate_area_with_example_backend(self):
+        options = self._options()
+        result = await generate_area(self.area, options, ExampleBackend(options), NoSearch(options))
+        self.assertEqual(result["objects"], len(self.objects))
+        self.assertEqual(result["assets"], 0)
+        self.assertTrue(result["complete"])
+        self.assertTrue(os.path.isfile(os.path.join(self._dir, "Warehouse_Area.usda")))
+
+    async def test_generate_compact_area(self):
+        options = self._options("--compact", "--layout-max-iterations", "0")
+        result = await generate_area(self.area, options, ExampleBackend(options), NoSearch(options))
+        self.assertEqual(result["objects"], len(self.objects))
+        self.assertTrue(result["complete"])
+
+    async def test_load_manifest(self):
+        path = os.path.join(self._dir, "areas.json")
+        with open(path, "w") as f:
+            json.dump({"areas": [{"name": "Office", "size": [600, 400]},
+                                 {"name": "Kitchen", "length": 300, "width": 200, "prompt": "Fridge"}]}, f)
+        areas = load_manifest(path)
+        self.assertEqual(areas[0], {"name": "Office", "length": 600.0, "width": 400.0, "prompt": ""})
+        self.assertEqual(areas[1]["prompt"], "Fridge")
+        with open(path, "w") as f:
+            json.dump([{"name": "Warehouse Area", "size": [1, 1]}, {"name": "Warehouse_Area", "size": [1, 1]}], f)
+        with self.assertRaises(ValueError):
+            load_manifest(path)
+
+    async def test_workers_share_the_quotas(self):
+        options = self._options("--workers", "4", "--requests-per-minute", "400", "--tokens-per-minute", "0")
+        batch._worker_limiter = None
+        limiter = get_worker_limiter(options)
+        batch._worker_limiter = None
+        self.assertEqual(limiter._requests.rate, 100 / 60.0)
+        self.assertEqual(limiter._tokens.rate, 0)
+
+    async def test_worker_session_is_shared_and_closed(self):
+        def worker():
+            # A worker thread has no running loop, like a worker process
+            async def open_session():
+                return batch.get_worker_session()
+            loop = batch._get_worker_loop()
+            sessions = [loop.run_until_complete(open_session()) for _ in range(2)]
+            batch._close_worker()
+            return sessions
+        saved = (batch._worker_loop, batch._worker_session)
+        batch._worker_loop, batch._worker_session = None, None
+        try:
+            first, second = await asyncio.get_event_loop().run_in_executor(None, worker)
+        finally:
+            batch._worker_loop, batch._worker_session = saved
+        self.assertIs(first, second)
+        self.assertTrue(first.closed)
@@ -0,0 +1,107 @@
+import os
+import time
+import shutil
+import tempfile
+import carb
+import omni.kit.test
+
+from omni.example.airoomgenerator.cache import PersistentLRUCache, make_cache_key, open_extension_cache
+
+
+class TestPersistentLRUCache(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.path = os.path.join(self._dir, "cache", "responses.json")
+
+    async def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    async def test_make_cache_key(self):
+        self.assertEqual(make_cache_key("a", {"x": 1, "y": 2}), make_cache_key("a", {"y": 2, "x": 1}))
+        self.assertNotEqual(make_cache_key("a", 1), make_cache_key("a", 2))
+
+    async def test_least_recently_used_is_evicted(self):
+        cache = PersistentLRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    async def test_entries_expire_after_ttl(self):
+        cache = PersistentLRUCache(ttl=0.05)
+        cache.put("a", 1)
+        self.assertIn("a", cache)
+        time.sleep(0.1)
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.get("a", "gone"), "gone")
+        self.assertEqual(len(cache), 0)
+
+    async def test_no_ttl_keeps_entries(self):
+        cache = PersistentLRUCache(ttl=0)
+        cache.put("a", 1)
+        time.sleep(0.01)
+        self.assertEqual(cache.get("a"), 1)
+
+    async def test_stats(self):
+        cache = PersistentLRUCache()
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    async def test_invalidate(self):
+        cache = PersistentLRUCache()
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.invalidate("a")
+        self.assertNotIn("a", cache)
+        self.assertIn("b", cache)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    async def test_saved_and_loaded(self):
+        cache = PersistentLRUCache(self.path, max_entries=3)
+        for key in "abcd":
+            cache.put(key, {"value": key})
+        cache.save()
+        loaded = PersistentLRUCache(self.path, max_entries=3)
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(loaded.get("d"), {"value": "d"})
+        self.assertIsNone(loaded.get("a"))
+        # A smaller cache keeps the most recently used entries of the file
+        self.assertEqual(len(PersistentLRUCache(self.path, max_entries=1)), 1)
+        self.assertIsNotNone(PersistentLRUCache(self.path, max_entries=1).get("d"))
+
+    async def test_expired_entries_are_not_saved(self):
+        cache = PersistentLRUCache(self.path, ttl=0.05)
+        cache.put("a", 1)
+        time.sleep(0.1)
+        cache.put("b", 2)
+        cache.save()
+        loaded = PersistentLRUCache(self.path, ttl=60)
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(loaded.get("b"), 2)
+
+    async def test_corrupt_file_is_ignored(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(len(PersistentLRUCache(self.path)), 0)
+
+    async def test_open_extension_cache(self):
+        settings = carb.settings.get_settings()
+        max_entries = settings.get_as_int("/exts/omni.example.airoomgenerator/search_cache/max_entries")
+        settings.set_int("/exts/omni.example.airoomgenerator/search_cache/max_entries", 3)
+        try:
+            cache = open_extension_cache("search_cache")
+        finally:
+            settings.set_int("/exts/omni.example.airoomgenerator/search_cache/max_entries", max_entries)
+        self.assertTrue(cache.path.endswith(os.path.join("omni.example.airoomgenerator", "search_cache.json")))
+        self.assertEqual(cache.max_entries, 3)
+        self.assertEqual(cache.ttl, settings.get_as_float("/exts/omni.example.airoomgenerator/search_cache/ttl"))
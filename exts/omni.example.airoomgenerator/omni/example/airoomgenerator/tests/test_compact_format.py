@@ -0,0 +1,29 @@
+import json
+import omni.kit.test
+
+from omni.example.airoomgenerator.compact_format import COLUMNS, parse_compact, row_to_object, to_compact
+from omni.example.airoomgenerator.prompts import assistant_input, few_shot_examples
+
+
+class TestCompactFormat(omni.kit.test.AsyncTestCase):
+    async def test_round_trip(self):
+        for text in [assistant_input] + [example["assistant"] for example in few_shot_examples]:
+            expected = json.loads(text)["area_objects_list"]
+            compact = json.loads(to_compact(text))
+            self.assertEqual(compact["columns"], COLUMNS)
+            self.assertEqual(len(compact["rows"]), len(expected))
+            self.assertEqual(parse_compact(compact), expected)
+
+    async def test_compact_is_shorter(self):
+        self.assertLess(len(to_compact(assistant_input)), len(assistant_input))
+
+    async def test_columns_from_the_response_are_used(self):
+        data = {"columns": ["Material", "object_name"], "rows": [["Oak", "Desk_1"]]}
+        self.assertEqual(parse_compact(data), [{"Material": "Oak", "object_name": "Desk_1"}])
+
+    async def test_row_to_object(self):
+        row = ["Desk_1", 1, 2, 3, 4, 5, 6, "Oak"]
+        item = row_to_object(row)
+        self.assertEqual(item["object_name"], "Desk_1")
+        self.assertEqual(item["Height"], 6)
+        self.assertEqual(item["Material"], "Oak")
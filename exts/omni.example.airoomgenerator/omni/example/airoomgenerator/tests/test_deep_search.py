@@ -0,0 +1,177 @@
+import os
+import types
+import shutil
+import asyncio
+import tempfile
+import omni.kit.test
+
+from omni.example.airoomgenerator import deep_search
+from omni.example.airoomgenerator.cache import PersistentLRUCache
+from omni.example.airoomgenerator.deep_search import _search_key, canonicalize_query, normalize_query
+
+
+class TestDeepSearchQueries(omni.kit.test.AsyncTestCase):
+    async def test_numbering_suffix_is_dropped(self):
+        self.assertEqual(canonicalize_query("Parts_Pallet_1"), "parts pallet")
+        self.assertEqual(canonicalize_query("Parts Pallet 2"), "parts pallet")
+        self.assertEqual(canonicalize_query("WoodenPallet_01_2"), "wooden pallet")
+
+    async def test_other_numbers_are_kept(self):
+        self.assertEqual(canonicalize_query("2 Seat Sofa"), "2 seat sofa")
+        self.assertEqual(canonicalize_query("Shelf_3_Tier_1"), "shelf 3 tier")
+        self.assertEqual(canonicalize_query("42"), "42")
+
+    async def test_nothing_left_falls_back_to_the_query(self):
+        self.assertEqual(canonicalize_query("__"), "__")
+        self.assertEqual(canonicalize_query(" Desk "), "desk")
+
+    async def test_strip_adjectives(self):
+        self.assertEqual(canonicalize_query("Heavy_Duty_Forklift_2", strip_adjectives=True), "forklift")
+        # A name made only of adjectives is kept whole
+        self.assertEqual(canonicalize_query("Big_Red", strip_adjectives=True), "big red")
+
+    async def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Comfortable   Sofa "), "comfortable sofa")
+
+    async def test_canonical_queries_are_searched_once(self):
+        searched = []
+
+        async def query_first(query, url, paths):
+            searched.append(query)
+            return (query, "/props/" + query.replace(" ", "_") + ".usd")
+        original = deep_search._query_first
+        deep_search._query_first = query_first
+        try:
+            result = await deep_search.query_items(
+                ["Parts_Pallet_1", "Parts_Pallet_2", "Office_Chair_1"], "omniverse://server/", [], canonicalize=True)
+        finally:
+            deep_search._query_first = original
+        self.assertEqual(sorted(searched), ["office chair", "parts pallet"])
+        self.assertEqual(result[0], ("Parts_Pallet_1", "/props/parts_pallet.usd"))
+        self.assertEqual(result[1], ("Parts_Pallet_2", "/props/parts_pallet.usd"))
+
+
+class TestQueryItems(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._query_first = deep_search._query_first
+
+    async def tearDown(self):
+        deep_search._query_first = self._query_first
+
+    async def test_results_keep_the_input_order(self):
+        async def query_first(query, url, paths):
+            # Later queries finish first
+            await asyncio.sleep(0.01 * (5 - int(query)))
+            return (query, "/props/" + query + ".usd")
+        deep_search._query_first = query_first
+        queries = [str(i) for i in range(5)]
+        result = await deep_search.query_items(queries, "omniverse://server/", [])
+        self.assertEqual(result, [(query, "/props/" + query + ".usd") for query in queries])
+
+    async def test_failed_search_gives_none(self):
+        async def query_first(query, url, paths):
+            if query == "Lamp":
+                raise ConnectionError("search service unavailable")
+            return (query, "/props/" + query + ".usd")
+        deep_search._query_first = query_first
+        result = await deep_search.query_items(["Desk", "Lamp", "Chair"], "omniverse://server/", [])
+        self.assertEqual(result, [("Desk", "/props/Desk.usd"), None, ("Chair", "/props/Chair.usd")])
+
+    async def test_timed_out_search_gives_none(self):
+        async def query_first(query, url, paths):
+            if query == "Lamp":
+                await asyncio.sleep(1.0)
+            return (query, "/props/" + query + ".usd")
+        deep_search._query_first = query_first
+        result = await deep_search.query_items(["Desk", "Lamp"], "omniverse://server/", [], timeout=0.05)
+        self.assertEqual(result, [("Desk", "/props/Desk.usd"), None])
+
+    async def test_concurrency_is_bounded(self):
+        in_flight = []
+        peak = []
+
+        async def query_first(query, url, paths):
+            in_flight.append(query)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.02)
+            in_flight.remove(query)
+            return (query, "/props/" + query + ".usd")
+        deep_search._query_first = query_first
+        result = await deep_search.query_items([str(i) for i in range(10)], "omniverse://server/", [],
+                                               max_concurrency=3)
+        self.assertEqual(max(peak), 3)
+        self.assertTrue(all(item is not None for item in result))
+
+
+class FakeSearchClient:
+    # Finds "/props/<query>.usd" for every query except "nothing"
+    def __init__(self):
+        self.queries = []
+
+    def get_instance(self):
+        return self
+
+    async def find2(self, query, url):
+        self.queries.append(query)
+        name = query.split(" ")[-1]
+        paths = [] if name == "nothing" else [types.SimpleNamespace(uri="/props/" + name + ".usd")]
+        return types.SimpleNamespace(paths=paths)
+
+
+class TestSearchCache(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.path = os.path.join(self._dir, "search_cache.json")
+        self._search_cache = deep_search._search_cache
+        self._client = deep_search.NGSearchClient
+        deep_search._search_cache = PersistentLRUCache(self.path)
+        self.client = FakeSearchClient()
+        deep_search.NGSearchClient = self.client
+
+    async def tearDown(self):
+        deep_search._search_cache = self._search_cache
+        deep_search.NGSearchClient = self._client
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    async def test_search_key(self):
+        key = _search_key("first", "Office  Chair", "omniverse://server/Assets/", ["/a", "/b"])
+        self.assertEqual(key, _search_key("first", " office chair", "omniverse://server/Assets", ["/b", "/a"]))
+        self.assertNotEqual(key, _search_key("first", "office chair", "omniverse://other/Assets", ["/a", "/b"]))
+        self.assertNotEqual(key, _search_key("first", "office chair", "omniverse://server/Assets", ["/a"]))
+        self.assertNotEqual(key, _search_key("all", "office chair", "omniverse://server/Assets", ["/a", "/b"]))
+
+    async def test_normalized_queries_are_searched_once(self):
+        url = "omniverse://server/"
+        self.assertEqual(await deep_search._query_first("Desk", url, []), ("Desk", "/props/Desk.usd"))
+        self.assertEqual(await deep_search._query_first(" desk", url, []), (" desk", "/props/Desk.usd"))
+        self.assertEqual(len(self.client.queries), 1)
+        # Nothing found is cached too
+        self.assertIsNone(await deep_search._query_first("nothing", url, []))
+        self.assertIsNone(await deep_search._query_first("nothing", url, []))
+        self.assertEqual(len(self.client.queries), 2)
+
+    async def test_path_filter_changes_are_searched_again(self):
+        url = "omniverse://server/"
+        await deep_search._query_first("Desk", url, [])
+        await deep_search._query_first("Desk", url, ["/Props"])
+        await deep_search._query_first("Desk", "omniverse://other/", ["/Props"])
+        self.assertEqual(len(self.client.queries), 3)
+        self.assertIn('path: "/Props"', self.client.queries[1])
+
+    async def test_clear_search_cache(self):
+        await deep_search._query_first("Desk", "omniverse://server/", [])
+        deep_search.clear_search_cache()
+        self.assertEqual(len(deep_search.get_search_cache()), 0)
+        await deep_search._query_first("Desk", "omniverse://server/", [])
+        self.assertEqual(len(self.client.queries), 2)
+        # The cleared cache is saved, a new session does not bring the entries back
+        self.assertEqual(len(PersistentLRUCache(self.path)), 0)
+
+    async def test_results_persist_across_sessions(self):
+        result = await deep_search.query_items(["Desk", "nothing"], "omniverse://server/", [])
+        self.assertEqual(result, [("Desk", "/props/Desk.usd"), None])
+        # query_items saves the cache, a new session reads it back without searching
+        deep_search._search_cache = PersistentLRUCache(self.path)
+        result = await deep_search.query_items(["desk", "nothing"], "omniverse://server/", [])
+        self.assertEqual(result, [("desk", "/props/Desk.usd"), None])
+        self.assertEqual(len(self.client.queries), 2)
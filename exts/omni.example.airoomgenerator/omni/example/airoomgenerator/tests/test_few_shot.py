@@ -0,0 +1,42 @@
+import omni.kit.test
+
+from omni.example.airoomgenerator.few_shot import FewShotIndex
+from omni.example.airoomgenerator.prompts import few_shot_examples
+
+
+def make_example(name, length, width, keywords="", assistant="{}"):
+    return {"area_name": name, "length": length, "width": width, "keywords": keywords, "user": name,
+            "assistant": assistant}
+
+
+class TestFewShotIndex(omni.kit.test.AsyncTestCase):
+    async def test_area_names_pick_their_example(self):
+        index = FewShotIndex(few_shot_examples)
+        self.assertEqual(index.select("Open Office", 600, 400)["area_name"], "Office")
+        self.assertEqual(index.select("Offices", 2000, 2000)["area_name"], "Office")
+        self.assertEqual(index.select("Warehouse 2", 1000, 1000)["area_name"], "Warehouse")
+        # Keywords count as much as the name
+        self.assertEqual(index.select("Storage", 300, 300)["area_name"], "Warehouse")
+
+    async def test_name_beats_size(self):
+        index = FewShotIndex([make_example("Office", 600, 400), make_example("Warehouse", 1000, 1000)])
+        self.assertEqual(index.select("Office", 1000, 1000)["area_name"], "Office")
+        self.assertEqual(index.select("Warehouse", 600, 400)["area_name"], "Warehouse")
+
+    async def test_size_decides_without_shared_words(self):
+        index = FewShotIndex([make_example("Office", 600, 400), make_example("Warehouse", 1000, 1000)])
+        self.assertEqual(index.select("Garage", 600, 400)["area_name"], "Office")
+        self.assertEqual(index.select("Garage", 1200, 1000)["area_name"], "Warehouse")
+
+    async def test_size_breaks_name_ties(self):
+        index = FewShotIndex([make_example("Small Room", 300, 300), make_example("Large Room", 1000, 1000)])
+        self.assertEqual(index.select("Room", 1000, 900)["area_name"], "Large Room")
+        self.assertEqual(index.select("Room", 300, 200)["area_name"], "Small Room")
+
+    async def test_shorter_example_wins_a_full_tie(self):
+        long_example = make_example("Office", 600, 400, assistant='{"area_objects_list": [' + "{}, " * 50 + "{}]}")
+        short_example = make_example("Office", 600, 400)
+        index = FewShotIndex([long_example, short_example])
+        self.assertIs(index.select("Office", 600, 400), short_example)
+        # Sizes close enough to round to the same score tie too
+        self.assertIs(index.select("Office", 620, 400), short_example)
@@ -0,0 +1,86 @@
+import json
+import random
+import numpy as np
+import omni.kit.test
+
+from omni.example.airoomgenerator.layout import count_overlaps, find_overlaps, resolve_layout, _to_arrays
+from omni.example.airoomgenerator.prompts import assistant_input
+from omni.example.airoomgenerator.benchmark import make_scattered_objects
+
+
+def make_object(name, x, z, length=100, width=100, y=0, height=100):
+    return {"object_name": name, "X": x, "Y": y, "Z": z, "Length": length, "Width": width, "Height": height,
+            "Material": "Oak"}
+
+
+class TestLayout(omni.kit.test.AsyncTestCase):
+    async def test_empty_list(self):
+        self.assertEqual(resolve_layout([], 500, 500), [])
+
+    async def test_objects_are_kept_inside_the_area(self):
+        objects = resolve_layout([make_object("Desk", 400, -400, length=200)], 500, 500)
+        self.assertEqual((objects[0]["X"], objects[0]["Z"]), (150.0, -200.0))
+
+    async def test_object_larger_than_the_area_is_centered(self):
+        objects = resolve_layout([make_object("Rug", 100, 30, length=800)], 500, 500)
+        self.assertEqual(objects[0]["X"], 0.0)
+        self.assertEqual(objects[0]["Z"], 30.0)
+
+    async def test_overlapping_objects_are_pushed_apart(self):
+        objects = [make_object("Chair", 0, 0), make_object("Table", 60, 10)]
+        resolved = resolve_layout(objects, 1000, 1000)
+        self.assertEqual(count_overlaps(resolved), 0)
+        # Pushed along X, where they overlap least, and both move
+        self.assertAlmostEqual(resolved[1]["X"] - resolved[0]["X"], 100.0)
+        self.assertEqual((resolved[0]["Z"], resolved[1]["Z"]), (0.0, 10.0))
+        # The input is not modified
+        self.assertEqual(objects[0]["X"], 0)
+
+    async def test_objects_at_the_same_spot_are_split(self):
+        resolved = resolve_layout([make_object("A", 0, 0), make_object("B", 0, 0)], 1000, 1000)
+        self.assertEqual(count_overlaps(resolved), 0)
+        self.assertLess(resolved[0]["X"], resolved[1]["X"])
+
+    async def test_stacked_objects_do_not_collide(self):
+        objects = [make_object("Shelf", 0, 0, height=100), make_object("Box", 0, 0, y=100, height=20)]
+        self.assertEqual(count_overlaps(objects), 0)
+        self.assertEqual(resolve_layout(objects, 1000, 1000), objects)
+
+    async def test_gap(self):
+        objects = [make_object("A", 0, 0), make_object("B", 105, 0)]
+        self.assertEqual(count_overlaps(objects), 0)
+        self.assertEqual(count_overlaps(objects, gap=10), 1)
+        resolved = resolve_layout(objects, 1000, 1000, gap=10)
+        self.assertAlmostEqual(resolved[1]["X"] - resolved[0]["X"], 110.0)
+
+    async def test_zero_iterations_only_clamps(self):
+        objects = [make_object("A", 0, 0), make_object("B", 50, 0)]
+        self.assertEqual(resolve_layout(objects, 1000, 1000, max_iterations=0), objects)
+
+    async def test_example_response(self):
+        objects = json.loads(assistant_input)["area_objects_list"]
+        self.assertGreater(count_overlaps(objects), 0)
+        resolved = resolve_layout(objects, 1000, 1000)
+        self.assertEqual(count_overlaps(resolved), 0)
+        for item in resolved:
+            self.assertLessEqual(abs(item["X"]) + item["Length"] * 0.5, 500 + 1e-6)
+
+    async def test_scattered_objects_settle(self):
+        # The benchmark's areas leave every object 300 x 300 cm, enough room for all of them
+        area_size = float(np.sqrt(500)) * 300
+        objects = make_scattered_objects(500, area_size)
+        self.assertGreater(count_overlaps(objects), 0)
+        self.assertEqual(count_overlaps(resolve_layout(objects, area_size, area_size)), 0)
+
+    async def test_grid_finds_the_same_pairs_as_brute_force(self):
+        rng = random.Random(7)
+        objects = [make_object(str(i), rng.uniform(-500, 500), rng.uniform(-500, 500),
+                               length=rng.uniform(10, 200), width=rng.uniform(10, 200)) for i in range(200)]
+        centers, half_sizes, heights = _to_arrays(objects)
+        first, second = find_overlaps(centers, half_sizes, heights)
+        expected = set()
+        for i in range(len(objects)):
+            for j in range(i + 1, len(objects)):
+                if np.all(half_sizes[i] + half_sizes[j] - np.abs(centers[i] - centers[j]) > 1e-3):
+                    expected.add((i, j))
+        self.assertEqual(set(zip(first.tolist(), second.tolist())), expected)
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import omni.kit.test
+
+from omni.example.airoomgenerator.local_index import LocalAssetIndex, tokenize
+
+
+class TestLocalAssetIndex(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.root = os.path.join(self._dir, "assets")
+        self.index_path = os.path.join(self._dir, "index", "local_index.json")
+        for path in ["furniture/chairs/Office_Chair.usd", "furniture/SM_WoodenPallet_01.usda",
+                     "furniture/Sofa.usdz", "vehicles/Forklift.usdc", "textures/wood.png"]:
+            self._touch(path)
+
+    async def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _touch(self, relative: str, mtime: float = None) -> str:
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("#usda 1.0\n")
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    async def test_tokenize(self):
+        self.assertEqual(tokenize("SM_WoodenPallet_01"), ["sm", "wooden", "pallet"])
+        self.assertEqual(tokenize("Office Chairs"), ["office", "chair"])
+        self.assertEqual(tokenize("Glass"), ["glass"])
+
+    async def test_refresh_indexes_usd_files_only(self):
+        index = LocalAssetIndex(self.root, self.index_path)
+        self.assertEqual(index.refresh(), (4, 0, 0))
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.refresh(), (0, 0, 0))
+
+    async def test_query_first(self):
+        index = LocalAssetIndex(self.root, self.index_path)
+        index.refresh()
+        query, path = index.query_first("wooden pallet")
+        self.assertEqual(query, "wooden pallet")
+        self.assertTrue(path.endswith("SM_WoodenPallet_01.usda"))
+        self.assertTrue(index.query_first("Office Chairs")[1].endswith("Office_Chair.usd"))
+        self.assertIsNone(index.query_first("piano"))
+        self.assertIsNone(index.query_first(""))
+
+    async def test_file_name_beats_folder(self):
+        index = LocalAssetIndex(self.root, self.index_path)
+        index.refresh()
+        # "furniture" is a folder of every match, "sofa" only the name of one
+        self.assertTrue(index.search("furniture sofa")[0][0].endswith("Sofa.usdz"))
+
+    async def test_refresh_picks_up_changes(self):
+        index = LocalAssetIndex(self.root, self.index_path)
+        index.refresh()
+        os.remove(os.path.join(self.root, "vehicles", "Forklift.usdc"))
+        self._touch("furniture/Sofa.usdz", mtime=1000.0)
+        self._touch("furniture/Desk.usd")
+        self.assertEqual(index.refresh(), (1, 1, 1))
+        self.assertIsNone(index.query_first("forklift"))
+        self.assertIsNotNone(index.query_first("desk"))
+
+    async def test_saved_index_is_loaded(self):
+        index = LocalAssetIndex(self.root, self.index_path)
+        index.refresh()
+        loaded = LocalAssetIndex(self.root, self.index_path)
+        self.assertEqual(len(loaded), 4)
+        self.assertEqual(loaded.last_refresh, index.last_refresh)
+        self.assertEqual(loaded.query_first("forklift"), index.query_first("forklift"))
+        # Only the files that changed since are read again
+        self.assertEqual(loaded.refresh(), (0, 0, 0))
+
+    async def test_index_of_another_root_is_ignored(self):
+        LocalAssetIndex(self.root, self.index_path).refresh()
+        other = LocalAssetIndex(os.path.join(self.root, "vehicles"), self.index_path)
+        self.assertEqual(len(other), 0)
@@ -0,0 +1,114 @@
+import carb
+import omni.kit.test
+import omni.usd
+
+from omni.example.airoomgenerator.item_generator import place_items
+from omni.example.airoomgenerator.authoring import GREYBOX_INSTANCER, get_item_keys
+
+ROOT = "/World/Layout/Office/items/"
+USE_INSTANCER = "/exts/omni.example.airoomgenerator/greybox/use_instancer"
+# Checked on the specs, a rewritten item loses it
+MARKER = "test_marker"
+
+
+def make_object(name, x, z=0.0):
+    # No material, so no Kit material is created
+    return {"object_name": name, "X": x, "Y": 0.0, "Z": z, "Length": 100.0, "Width": 50.0, "Height": 80.0,
+            "Material": ""}
+
+
+class TestPlaceItems(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        await omni.usd.get_context().new_stage_async()
+        self.stage = omni.usd.get_context().get_stage()
+        self.layer = self.stage.GetRootLayer()
+        self._settings = carb.settings.get_settings()
+        self._use_instancer = self._settings.get_as_bool(USE_INSTANCER)
+        self._settings.set_bool(USE_INSTANCER, False)
+
+    async def tearDown(self):
+        self._settings.set_bool(USE_INSTANCER, self._use_instancer)
+
+    def _place(self, objects, remove_missing=True):
+        place_items(objects, [None] * len(objects), ROOT, remove_missing=remove_missing, layer=self.layer)
+
+    def _mark(self, name):
+        spec = self.layer.GetPrimAtPath(ROOT + name)
+        spec.customData = {MARKER: True}
+
+    def _is_marked(self, name):
+        return self.layer.GetPrimAtPath(ROOT + name).customData.get(MARKER, False)
+
+    def _translate(self, name):
+        return self.stage.GetPrimAtPath(ROOT + name + "/" + name).GetAttribute("xformOp:translate").Get()
+
+    async def test_items_are_placed_with_keys(self):
+        self._place([make_object("Desk", 0), make_object("Office Chair", 200)])
+        keys = get_item_keys(self.stage, ROOT)
+        self.assertEqual(sorted(keys), ["Desk", "Office_Chair"])
+        self.assertTrue(all(key != "" for key in keys.values()))
+        self.assertEqual(self._translate("Office_Chair")[0], 200)
+
+    async def test_unchanged_items_are_skipped(self):
+        objects = [make_object("Desk", 0), make_object("Chair", 200)]
+        self._place(objects)
+        self._mark("Desk")
+        self._mark("Chair")
+        self._place([dict(item) for item in objects])
+        self.assertTrue(self._is_marked("Desk"))
+        self.assertTrue(self._is_marked("Chair"))
+
+    async def test_changed_items_are_rewritten(self):
+        self._place([make_object("Desk", 0), make_object("Chair", 200)])
+        keys = get_item_keys(self.stage, ROOT)
+        self._mark("Desk")
+        self._mark("Chair")
+        self._place([make_object("Desk", 0), make_object("Chair", 300)])
+        self.assertTrue(self._is_marked("Desk"))
+        self.assertFalse(self._is_marked("Chair"))
+        self.assertEqual(self._translate("Chair")[0], 300)
+        self.assertNotEqual(get_item_keys(self.stage, ROOT)["Chair"], keys["Chair"])
+
+    async def test_missing_items_are_removed(self):
+        self._place([make_object("Desk", 0), make_object("Chair", 200)])
+        self._place([make_object("Desk", 0)])
+        self.assertEqual(list(get_item_keys(self.stage, ROOT)), ["Desk"])
+        self.assertFalse(self.stage.GetPrimAtPath(ROOT + "Chair").IsValid())
+
+    async def test_streamed_items_keep_the_others(self):
+        self._place([make_object("Desk", 0)])
+        self._place([make_object("Chair", 200)], remove_missing=False)
+        self.assertEqual(sorted(get_item_keys(self.stage, ROOT)), ["Chair", "Desk"])
+
+    async def test_instanced_greyboxes(self):
+        self._settings.set_bool(USE_INSTANCER, True)
+        objects = [make_object("Desk", 0), make_object("Chair", 200)]
+        self._place(objects)
+        self.assertEqual(list(get_item_keys(self.stage, ROOT)), [GREYBOX_INSTANCER])
+        instancer = self.stage.GetPrimAtPath(ROOT + GREYBOX_INSTANCER)
+        self.assertEqual(instancer.GetTypeName(), "PointInstancer")
+        self.assertEqual(len(instancer.GetAttribute("positions").Get()), 2)
+
+        # The same list leaves the instancer alone
+        self._mark(GREYBOX_INSTANCER)
+        self._place([dict(item) for item in objects])
+        self.assertTrue(self._is_marked(GREYBOX_INSTANCER))
+
+        # Any change rewrites all instances
+        self._place([make_object("Desk", 0), make_object("Chair", 300), make_object("Lamp", 400)])
+        self.assertFalse(self._is_marked(GREYBOX_INSTANCER))
+        positions = instancer.GetAttribute("positions").Get()
+        self.assertEqual(sorted(position[0] for position in positions), [0, 300, 400])
+
+    async def test_streamed_instances_replace_by_name(self):
+        self._settings.set_bool(USE_INSTANCER, True)
+        self._place([make_object("Desk", 0)], remove_missing=False)
+        self._place([make_object("Desk", 100)], remove_missing=False)
+        self._place([make_object("Chair", 200)], remove_missing=False)
+        instancer = self.stage.GetPrimAtPath(ROOT + GREYBOX_INSTANCER)
+        self.assertEqual(list(instancer.GetAttribute("object_names").Get()), ["Desk", "Chair"])
+        self.assertEqual([position[0] for position in instancer.GetAttribute("positions").Get()], [100, 200])
+        # The next full list always rewrites streamed instances
+        self.assertEqual(get_item_keys(self.stage, ROOT)[GREYBOX_INSTANCER], "")
+        self._place([make_object("Desk", 100), make_object("Chair", 200)])
+        self.assertNotEqual(get_item_keys(self.stage, ROOT)[GREYBOX_INSTANCER], "")
@@ -0,0 +1,71 @@
+import time
+import asyncio
+import omni.kit.test
+
+from omni.example.airoomgenerator.rate_limiter import RequestLimiter, TokenBucket
+
+
+class TestRateLimiter(omni.kit.test.AsyncTestCase):
+    async def test_bucket_allows_a_burst_up_to_capacity(self):
+        bucket = TokenBucket(600, capacity=3)
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    async def test_bucket_waits_for_refill(self):
+        # 600 per minute is one every 0.1 s
+        bucket = TokenBucket(600, capacity=1)
+        await bucket.acquire()
+        start = time.monotonic()
+        await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+
+    async def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(0)
+        start = time.monotonic()
+        for _ in range(1000):
+            await bucket.acquire(100)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    async def test_request_larger_than_bucket_does_not_wait_forever(self):
+        bucket = TokenBucket(6000, capacity=10)
+        await asyncio.wait_for(bucket.acquire(50), 1.0)
+
+    async def test_concurrency_is_bounded(self):
+        limiter = RequestLimiter(max_concurrency=2)
+        in_flight = []
+        peak = []
+
+        async def request():
+            async with limiter.limit():
+                in_flight.append(1)
+                peak.append(len(in_flight))
+                await asyncio.sleep(0.02)
+                in_flight.pop()
+        await asyncio.gather(*[request() for _ in range(6)])
+        self.assertEqual(max(peak), 2)
+
+    async def _limit_within(self, limiter, tokens: float, timeout: float) -> bool:
+        async def request():
+            async with limiter.limit(tokens):
+                pass
+        try:
+            await asyncio.wait_for(request(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def test_requests_per_minute(self):
+        limiter = RequestLimiter(requests_per_minute=2)
+        self.assertTrue(await self._limit_within(limiter, 0, 0.05))
+        self.assertTrue(await self._limit_within(limiter, 0, 0.05))
+        # The next request is 30 s away
+        self.assertFalse(await self._limit_within(limiter, 0, 0.05))
+
+    async def test_tokens_per_minute(self):
+        limiter = RequestLimiter(tokens_per_minute=1000)
+        self.assertTrue(await self._limit_within(limiter, 600, 0.05))
+        self.assertFalse(await self._limit_within(limiter, 600, 0.05))
+        # Requests without a token count only wait for the requests quota
+        self.assertTrue(await self._limit_within(limiter, 0, 0.05))
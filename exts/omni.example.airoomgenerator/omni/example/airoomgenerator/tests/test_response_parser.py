@@ -0,0 +1,80 @@
+import json
+import omni.kit.test
+
+from omni.example.airoomgenerator.response_parser import (ObjectStreamParser, extract_json_text, parse_objects,
+                                                          validate_object)
+from omni.example.airoomgenerator.compact_format import COLUMNS, to_compact
+from omni.example.airoomgenerator.prompts import assistant_input
+
+
+class TestResponseParser(omni.kit.test.AsyncTestCase):
+    async def test_clean_response(self):
+        objects, complete = parse_objects(assistant_input)
+        self.assertTrue(complete)
+        self.assertEqual(len(objects), len(json.loads(assistant_input)["area_objects_list"]))
+        self.assertIsInstance(objects[0]["X"], float)
+
+    async def test_fenced_response_is_complete(self):
+        text = "Here is the layout:\n```json\n" + assistant_input + "\n```\nEnjoy!"
+        objects, complete = parse_objects(text)
+        self.assertTrue(complete)
+        self.assertEqual(objects, parse_objects(assistant_input)[0])
+        self.assertEqual(json.loads(extract_json_text(text)), json.loads(assistant_input))
+
+    async def test_truncated_response_keeps_complete_objects(self):
+        expected = json.loads(assistant_input)["area_objects_list"]
+        cut = assistant_input.index('"object_name": "' + expected[3]["object_name"])
+        objects, complete = parse_objects(assistant_input[:cut + 20])
+        self.assertFalse(complete)
+        self.assertEqual([item["object_name"] for item in objects], [item["object_name"] for item in expected[:3]])
+
+    async def test_empty_list_is_a_valid_answer(self):
+        objects, complete = parse_objects('{"area_name": "Closet", "area_objects_list": []}')
+        self.assertEqual(objects, [])
+        self.assertTrue(complete)
+        objects, complete = parse_objects('{"area_name": "Closet", "columns": [], "rows": []}', compact=True)
+        self.assertEqual(objects, [])
+        self.assertTrue(complete)
+
+    async def test_unusable_response(self):
+        self.assertEqual(parse_objects("Sorry, I can not help with that."), (None, False))
+        self.assertEqual(parse_objects('{"area_objects_list": [{"X": 1}]}'), (None, False))
+
+    async def test_invalid_objects_are_dropped(self):
+        text = json.dumps({"area_objects_list": [
+            {"object_name": "Desk", "X": 1, "Y": 0, "Z": 2, "Length": 3, "Width": 4, "Height": 5, "Material": "Oak"},
+            {"object_name": "Chair", "X": "left", "Z": 2, "Length": 3, "Width": 4, "Height": 5},
+        ]})
+        objects, complete = parse_objects(text)
+        self.assertFalse(complete)
+        self.assertEqual([item["object_name"] for item in objects], ["Desk"])
+
+    async def test_compact_response(self):
+        objects, complete = parse_objects(to_compact(assistant_input), compact=True)
+        self.assertTrue(complete)
+        self.assertEqual(objects, parse_objects(assistant_input)[0])
+
+    async def test_validate_object(self):
+        item = validate_object({"object_name": " Desk ", "X": "1", "Z": 2, "Length": 3, "Width": 4, "Height": 5})
+        self.assertEqual(item["object_name"], "Desk")
+        self.assertEqual(item["X"], 1.0)
+        self.assertEqual(item["Y"], 0.0)
+        self.assertEqual(item["Material"], "")
+        self.assertIsNone(validate_object({"object_name": "Desk", "X": True}))
+        self.assertIsNone(validate_object("Desk"))
+
+    async def test_stream_parser_returns_objects_as_they_complete(self):
+        parser = ObjectStreamParser()
+        streamed = []
+        counts = []
+        for i in range(0, len(assistant_input), 7):
+            streamed.extend(parser.feed(assistant_input[i:i + 7]))
+            counts.append(len(streamed))
+        self.assertTrue(parser.done)
+        self.assertEqual(streamed, json.loads(assistant_input)["area_objects_list"])
+        # Objects arrive one by one, not all at the end
+        self.assertGreater(len(set(counts)), len(streamed))
+
+    async def test_stream_parser_compact_rows(self):
+        parser = ObjectStreamParser("rows", COLUMNS)
+        self.assertEqual(parser.feed(to_compact(assistant_input)), json.loads(assistant_input)["area_objects_list"])
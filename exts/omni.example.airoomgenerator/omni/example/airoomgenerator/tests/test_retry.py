@@ -0,0 +1,83 @@
+import time
+import asyncio
+import omni.kit.test
+
+from omni.example.airoomgenerator.retry import (RetryableError, LatencyTracker, parse_retry_after, backoff_delay,
+                                                call_with_retries, call_hedged)
+
+
+class TestRetry(omni.kit.test.AsyncTestCase):
+    def _failing(self, failures: int, retry_after: float = None):
+        calls = []
+
+        async def attempt():
+            calls.append(time.monotonic())
+            if len(calls) <= failures:
+                raise RetryableError("busy", retry_after)
+            return "ok"
+        return attempt, calls
+
+    async def test_retries_until_success(self):
+        attempt, calls = self._failing(2)
+        result = await call_with_retries(attempt, max_retries=3, base_delay=0.001, max_delay=0.001)
+        self.assertEqual(result, "ok")
+        self.assertEqual(len(calls), 3)
+
+    async def test_gives_up_after_max_retries(self):
+        attempt, calls = self._failing(5)
+        with self.assertRaises(RetryableError):
+            await call_with_retries(attempt, max_retries=2, base_delay=0.001, max_delay=0.001)
+        self.assertEqual(len(calls), 3)
+
+    async def test_other_errors_are_not_retried(self):
+        calls = []
+
+        async def attempt():
+            calls.append(1)
+            raise ValueError("bad request")
+        with self.assertRaises(ValueError):
+            await call_with_retries(attempt, max_retries=3, base_delay=0.001)
+        self.assertEqual(len(calls), 1)
+
+    async def test_retry_after_is_used_as_delay(self):
+        attempt, calls = self._failing(1, retry_after=0.1)
+        await call_with_retries(attempt, max_retries=1, base_delay=10.0, max_delay=10.0)
+        self.assertGreaterEqual(calls[1] - calls[0], 0.09)
+
+    async def test_no_attempt_past_the_deadline(self):
+        attempt, calls = self._failing(5, retry_after=1.0)
+        start = time.monotonic()
+        with self.assertRaises(RetryableError):
+            await call_with_retries(attempt, max_retries=5, deadline=start + 0.5)
+        self.assertEqual(len(calls), 1)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    async def test_backoff_delay_is_capped(self):
+        for attempt in range(10):
+            delay = backoff_delay(attempt, 0.5, 4.0)
+            self.assertGreaterEqual(delay, 0.0)
+            self.assertLessEqual(delay, min(4.0, 0.5 * 2 ** attempt))
+
+    async def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("2"), 2.0)
+        self.assertEqual(parse_retry_after("-1"), 0.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"))
+
+    async def test_latency_percentile(self):
+        tracker = LatencyTracker(max_samples=100)
+        self.assertIsNone(tracker.percentile(95))
+        for latency in range(1, 101):
+            tracker.record(float(latency))
+        self.assertEqual(tracker.percentile(50), 51.0)
+        self.assertEqual(tracker.percentile(100), 100.0)
+        self.assertIsNone(tracker.percentile(50, min_samples=200))
+
+    async def test_hedged_call_returns_the_faster_attempt(self):
+        delays = [0.5, 0.01]
+
+        async def attempt():
+            delay = delays.pop(0)
+            await asyncio.sleep(delay)
+            return delay
+        self.assertEqual(await call_hedged(attempt, hedge_after=0.05), 0.01)
@@ -0,0 +1,62 @@
+import asyncio
+import omni.kit.test
+
+from omni.example.airoomgenerator.singleflight import SingleFlight
+
+
+class TestSingleFlight(omni.kit.test.AsyncTestCase):
+    async def test_concurrent_calls_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def make_call():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "chair"
+        results = await asyncio.gather(*[flight.do("chair", make_call) for _ in range(5)])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result for result, _ in results], ["chair"] * 5)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True, True])
+        self.assertEqual(len(flight), 0)
+
+    async def test_different_keys_are_not_shared(self):
+        flight = SingleFlight()
+
+        async def make_call(value):
+            await asyncio.sleep(0.01)
+            return value
+        results = await asyncio.gather(flight.do("a", lambda: make_call("a")), flight.do("b", lambda: make_call("b")))
+        self.assertEqual(results, [("a", False), ("b", False)])
+
+    async def test_finished_calls_are_made_again(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def make_call():
+            calls.append(1)
+            return len(calls)
+        self.assertEqual(await flight.do("a", make_call), (1, False))
+        self.assertEqual(await flight.do("a", make_call), (2, False))
+
+    async def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+
+        async def make_call():
+            await asyncio.sleep(0.01)
+            raise ValueError("search failed")
+        results = await asyncio.gather(flight.do("a", make_call), flight.do("a", make_call), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(len(flight), 0)
+
+    async def test_cancelled_caller_does_not_cancel_the_call(self):
+        flight = SingleFlight()
+
+        async def make_call():
+            await asyncio.sleep(0.05)
+            return "done"
+        first = asyncio.ensure_future(flight.do("a", make_call))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.do("a", make_call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        self.assertEqual(await second, ("done", True))
@@ -0,0 +1,53 @@
+import omni.kit.test
+from pxr import Usd
+
+from omni.example.airoomgenerator.stage_registry import PerStageRegistry
+from omni.example.airoomgenerator.bbox_service import BBoxService
+
+
+class StageObject:
+    def __init__(self, stage, name="default"):
+        self.stage = stage
+        self.name = name
+        self.revoked = False
+
+    def revoke(self):
+        self.revoked = True
+
+
+class TestPerStageRegistry(omni.kit.test.AsyncTestCase):
+    async def test_one_object_per_stage(self):
+        registry = PerStageRegistry(StageObject)
+        stage = Usd.Stage.CreateInMemory()
+        first = registry.get(stage, "first")
+        self.assertEqual(first.name, "first")
+        # The arguments only matter when the object is built
+        self.assertIs(registry.get(stage, "second"), first)
+
+        other = registry.get(Usd.Stage.CreateInMemory())
+        self.assertIsNot(other, first)
+        self.assertTrue(first.revoked)
+        self.assertFalse(other.revoked)
+
+    async def test_release(self):
+        registry = PerStageRegistry(StageObject)
+        stage = Usd.Stage.CreateInMemory()
+        first = registry.get(stage)
+        registry.release()
+        self.assertTrue(first.revoked)
+        self.assertIsNot(registry.get(stage), first)
+        # Nothing to release twice
+        registry.release()
+        registry.release()
+
+    async def test_objects_without_revoke(self):
+        registry = PerStageRegistry(lambda stage: type("Plain", (), {"stage": stage})())
+        registry.get(Usd.Stage.CreateInMemory())
+        registry.get(Usd.Stage.CreateInMemory())
+        registry.release()
+
+    async def test_listeners_are_revoked(self):
+        registry = PerStageRegistry(BBoxService)
+        service = registry.get(Usd.Stage.CreateInMemory())
+        registry.release()
+        self.assertIsNone(service._listener)
@@ -0,0 +1,57 @@
+import omni.kit.test
+
+from omni.example.airoomgenerator import token_budget
+from omni.example.airoomgenerator.token_budget import PromptBudget, count_message_tokens, count_tokens, fit_to_budget
+from omni.example.airoomgenerator.prompts import build_messages
+
+
+class TestTokenBudget(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        # The estimate is what runs without tiktoken, test it either way
+        self._tiktoken = token_budget.tiktoken
+        token_budget.tiktoken = None
+
+    async def tearDown(self):
+        token_budget.tiktoken = self._tiktoken
+
+    async def test_count_tokens_estimate(self):
+        self.assertEqual(count_tokens(""), 0)
+        # A token per word and another per 6 letters
+        self.assertEqual(count_tokens("Office chair"), 3)
+        self.assertEqual(count_tokens("Refrigerator"), 3)
+        # Numbers take a token per 3 digits, punctuation one each
+        self.assertEqual(count_tokens("600x400, 12345678"), 9)
+
+    async def test_message_framing(self):
+        messages = [{"role": "system", "content": "Office chair"}, {"role": "user", "content": "Desk"}]
+        self.assertEqual(count_message_tokens(messages), (3 + 4) + (1 + 4) + 3)
+        budget = PromptBudget(messages)
+        self.assertEqual(budget.total, count_message_tokens(messages))
+        self.assertEqual(budget.describe(), "Prompt tokens: 15 (system 7, user 5)")
+
+    async def test_within(self):
+        budget = PromptBudget(build_messages("Office, 600x400"))
+        self.assertTrue(budget.within(budget.total))
+        self.assertFalse(budget.within(budget.total - 1))
+        # 0 disables the check
+        self.assertTrue(budget.within(0))
+
+    async def test_example_is_dropped_over_budget(self):
+        messages = build_messages("Office, 600x400")
+        total = count_message_tokens(messages)
+        sent, budget = fit_to_budget(messages, total)
+        self.assertIs(sent, messages)
+        self.assertEqual(budget.total, total)
+
+        sent, budget = fit_to_budget(messages, total - 1)
+        self.assertEqual(sent, [messages[0], messages[-1]])
+        # The budget reported is the one of the request that did not fit
+        self.assertEqual(budget.total, total)
+        self.assertEqual([role for role, _ in budget.parts], ["system", "user", "assistant", "user"])
+        self.assertLess(count_message_tokens(sent), total - 1)
+
+    async def test_prompt_without_example_is_kept(self):
+        messages = build_messages("Office, 600x400")
+        messages = [messages[0], messages[-1]]
+        sent, _ = fit_to_budget(messages, 10)
+        self.assertEqual(sent, messages)
@@ -0,0 +1,114 @@
+import os
+import json
+import types
+import shutil
+import asyncio
+import tempfile
+import omni.kit.test
+
+from omni.example.airoomgenerator import tracing
+from omni.example.airoomgenerator.tracing import Tracer
+
+
+class FakeClock:
+    # perf_counter that only moves when told to
+    def __init__(self):
+        self.now = 100.0
+
+    def perf_counter(self):
+        return self.now
+
+
+class TestTracer(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._time = tracing.time
+        self.clock = FakeClock()
+        tracing.time = types.SimpleNamespace(perf_counter=self.clock.perf_counter)
+        self.tracer = Tracer()
+        self.tracer.enabled = True
+
+    async def tearDown(self):
+        tracing.time = self._time
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _export(self):
+        path = os.path.join(self._dir, "traces", "trace.json")
+        self.tracer.export_chrome_trace(path)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def test_disabled_tracer_records_nothing(self):
+        self.tracer.enabled = False
+        with self.tracer.span("llm"):
+            self.clock.now += 1.0
+        self.assertEqual(self.tracer.summary(), {})
+        self.assertEqual(self._export()["traceEvents"], [])
+
+    async def test_nested_spans_are_exported(self):
+        with self.tracer.span("generate", area="Office"):
+            self.clock.now += 0.5
+            with self.tracer.span("llm", attempt=1):
+                self.clock.now += 2.0
+            self.clock.now += 0.25
+        data = self._export()
+        self.assertEqual(data["displayTimeUnit"], "ms")
+        metadata, llm, generate = data["traceEvents"]
+        self.assertEqual(metadata, {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "main"}})
+        # Inner spans end first, times are microseconds from the tracer's creation
+        self.assertEqual((llm["name"], llm["ph"], llm["tid"]), ("llm", "X", 1))
+        self.assertAlmostEqual(llm["ts"], 0.5e6)
+        self.assertAlmostEqual(llm["dur"], 2.0e6)
+        self.assertEqual(llm["args"], {"attempt": "1"})
+        self.assertAlmostEqual(generate["ts"], 0.0)
+        self.assertAlmostEqual(generate["dur"], 2.75e6)
+        self.assertEqual(generate["args"], {"area": "Office"})
+
+    async def test_span_is_recorded_when_the_stage_fails(self):
+        with self.assertRaises(ValueError):
+            with self.tracer.span("parse"):
+                self.clock.now += 0.01
+                raise ValueError("bad json")
+        self.assertEqual(self.tracer.summary()["parse"]["count"], 1)
+
+    async def test_tracks_per_task(self):
+        async def generate(area):
+            token = self.tracer.set_track(area)
+            try:
+                with self.tracer.span("llm"):
+                    await asyncio.sleep(0)
+            finally:
+                self.tracer.reset_track(token)
+        await asyncio.gather(generate("Office"), generate("Kitchen"))
+        events = self._export()["traceEvents"]
+        tracks = {event["args"]["name"]: event["tid"] for event in events if event["ph"] == "M"}
+        self.assertEqual(sorted(tracks), ["Kitchen", "Office"])
+        self.assertEqual(sorted(event["tid"] for event in events if event["ph"] == "X"), sorted(tracks.values()))
+        # The caller's track is untouched
+        with self.tracer.span("place"):
+            pass
+        self.assertEqual(self._export()["traceEvents"][-2]["args"], {"name": "main"})
+
+    async def test_summary_percentiles(self):
+        for duration in range(1, 21):
+            with self.tracer.span("search"):
+                self.clock.now += duration / 1000.0
+        with self.tracer.span("place"):
+            self.clock.now += 0.005
+        summary = self.tracer.summary()
+        self.assertEqual(summary["search"]["count"], 20)
+        # Nearest rank over 1..20 ms
+        self.assertAlmostEqual(summary["search"]["p50"], 11.0)
+        self.assertAlmostEqual(summary["search"]["p95"], 19.0)
+        self.assertAlmostEqual(summary["place"]["p95"], 5.0)
+        self.assertEqual(self.tracer.describe().splitlines(), [
+            "Stage timings (ms):",
+            "  search: p50 11.0, p95 19.0 (20 spans)",
+            "  place: p50 5.0, p95 5.0 (1 spans)",
+        ])
+
+    async def test_clear(self):
+        with self.tracer.span("llm"):
+            pass
+        self.tracer.clear()
+        self.assertEqual(self.tracer.summary(), {})
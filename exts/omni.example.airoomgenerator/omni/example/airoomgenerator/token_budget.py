@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+
+# tiktoken gives exact counts when it is installed, otherwise fall back to an estimate
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_WORD_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_encodings = {}
+
+def _get_encoding(model: str):
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("cl100k_base")
+    return _encodings[model]
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    if tiktoken is not None:
+        return len(_get_encoding(model).encode(text))
+    # Words average a bit more than one token, digits and punctuation about one each
+    count = 0
+    for piece in _WORD_PATTERN.findall(text):
+        count += 1 + len(piece) // 6 if piece[0].isalpha() else 1 + len(piece) // 3
+    return count
+
+def count_message_tokens(messages: list, model: str = "gpt-3.5-turbo") -> int:
+    # Every chat message carries a few tokens of framing, and the reply is primed with 3 more
+    return sum(count_tokens(message["content"], model) + 4 for message in messages) + 3
+
+class PromptBudget:
+    # Breaks the size of a chat request down by message so oversized prompts are easy to spot
+    def __init__(self, messages: list, model: str = "gpt-3.5-turbo") -> None:
+        self.model = model
+        self.parts = [(message["role"], count_tokens(message["content"], model) + 4) for message in messages]
+        self.total = sum(tokens for _, tokens in self.parts) + 3
+
+    def within(self, max_tokens: int) -> bool:
+        return max_tokens <= 0 or self.total <= max_tokens
+
+    def describe(self) -> str:
+        parts = ", ".join(f"{role} {tokens}" for role, tokens in self.parts)
+        return f"Prompt tokens: {self.total} ({parts})"
+
+def fit_to_budget(messages: list, max_tokens: int, model: str = "gpt-3.5-turbo"):
+    # Drops the few-shot example between the system message and the prompt when the request is
+    # over max_tokens. Returns the messages to send and the budget of the first, oversized, request.
+    budget = PromptBudget(messages, model)
+    if budget.within(max_tokens) or len(messages) <= 2:
+        return messages, budget
+    return [messages[0], messages[-1]], budget
@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import time
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from .retry import percentile
+
+# Spans are grouped by track (one per area), set per asyncio task so concurrent areas stay apart
+_current_track = contextvars.ContextVar("airoomgenerator_trace_track", default="main")
+
+class Tracer:
+    # Records timed spans of the generation pipeline, exports them as Chrome trace JSON
+    # (chrome://tracing or https://ui.perfetto.dev) and summarizes them per stage.
+    def __init__(self, max_spans: int = 10000) -> None:
+        self.enabled = False
+        self._spans = deque(maxlen=max_spans)
+        self._origin = time.perf_counter()
+
+    def set_track(self, name: str):
+        # Returns a token for reset_track
+        return _current_track.set(name)
+
+    def reset_track(self, token) -> None:
+        _current_track.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **args):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._spans.append((name, _current_track.get(), start, time.perf_counter(), args))
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+    def summary(self) -> dict:
+        # Stage name to count, p50 and p95 durations in milliseconds
+        durations = {}
+        for name, _, start, end, _ in self._spans:
+            durations.setdefault(name, []).append((end - start) * 1000.0)
+        result = {}
+        for name, values in durations.items():
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+            }
+        return result
+
+    def describe(self) -> str:
+        lines = ["Stage timings (ms):"]
+        for name, stats in self.summary().items():
+            lines.append(f"  {name}: p50 {stats['p50']:.1f}, p95 {stats['p95']:.1f} ({stats['count']} spans)")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str) -> None:
+        tracks = {}
+        events = []
+        for name, track, start, end, args in self._spans:
+            if track not in tracks:
+                tracks[track] = len(tracks) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tracks[track],
+                               "args": {"name": track}})
+            events.append({
+                "name": name,
+                "ph": "X",
+                "pid": 1,
+                "tid": tracks[track],
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "args": {key: str(value) for key, value in args.items()},
+            })
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+_tracer = Tracer()
+
+def get_tracer() -> Tracer:
+    return _tracer
@@ -13,16 +13,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import carb
 import omni.kit.commands
+import numpy as np
 from pxr import  Gf, Sdf, UsdGeom
 from .materials import *
-import carb
+from .bbox_service import get_bbox_service
 
 def CreateCubeFromCurve(curve_path: str, area_name: str = ""):
     ctx = omni.usd.get_context()
     stage = ctx.get_stage()
     min_coords, max_coords = get_coords_from_bbox(curve_path)
-    x,y,z = get_bounding_box_dimensions(curve_path)
+    if np.isnan(min_coords).any():
+        carb.log_error(f"Can not create an area from {curve_path}, it has no bounds")
+        return None
+    x,y,z = max_coords - min_coords
     xForm_scale = Gf.Vec3d(x, 1, z)
     cube_scale = Gf.Vec3d(0.01, 0.01, 0.01)
     prim = stage.GetPrimAtPath(curve_path)
@@ -71,13 +76,16 @@ def apply_material_to_prim(material_name: str, prim_path: str):
     mat_prim = stage.GetPrimAtPath(mat_path)
     if MaterialPresets.get(material_name, None) is not None:
         if not mat_prim.IsValid():
-            omni.kit.commands.execute('CreateMdlMaterialPrimCommand',
-                mtl_url=MaterialPresets[material_name],
-                mtl_name=material_name,
-                mtl_path=mat_path)
+            create_preset_material(material_name, mat_path)
         omni.kit.commands.execute('BindMaterialCommand',
             prim_path=prim_path,
             material_path=mat_path)
+
+def create_preset_material(material_name: str, mat_path: str):
+    omni.kit.commands.execute('CreateMdlMaterialPrimCommand',
+        mtl_url=MaterialPresets[material_name],
+        mtl_name=material_name,
+        mtl_path=mat_path)
     
 def create_prim(prim_path, prim_type='Xform'):
     ctx = omni.usd.get_context()
@@ -100,39 +108,7 @@ def set_transformTRS_attrs(prim, translate: Gf.Vec3d = Gf.Vec3d(0,0,0), rotate:
     prim.GetAttribute('xformOp:rotateXYZ').Set(rotate)
     prim.GetAttribute('xformOp:scale').Set(scale)
     
-def get_bounding_box_dimensions(prim_path: str):
-    min_coords, max_coords = get_coords_from_bbox(prim_path)
-    length = max_coords[0] - min_coords[0]
-    width = max_coords[1] - min_coords[1]
-    height = max_coords[2] - min_coords[2]
-    return length, width, height
-
 def get_coords_from_bbox(prim_path: str):
-    ctx = omni.usd.get_context()
-    bbox = ctx.compute_path_world_bounding_box(prim_path)
-    min_coords, max_coords = bbox
-    return min_coords, max_coords
-
-def scale_object_if_needed(prim_path):
     stage = omni.usd.get_context().get_stage()
-
-    length, width, height = get_bounding_box_dimensions(prim_path)
-    largest_dimension = max(length, width, height)
-
-    if largest_dimension < 10:
-        prim = stage.GetPrimAtPath(prim_path)
-
-        # HACK: All Get Attribute Calls need to check if the attribute exists and add it if it doesn't
-        if prim.IsValid():
-            scale_attr = prim.GetAttribute('xformOp:scale')
-            if scale_attr.IsValid():
-                current_scale = scale_attr.Get()
-                new_scale = (current_scale[0] * 100, current_scale[1] * 100, current_scale[2] * 100)
-                scale_attr.Set(new_scale)
-                carb.log_info(f"Scaled object by 100 times: {prim_path}")
-            else:
-                carb.log_info(f"Scale attribute not found for prim at path: {prim_path}")
-        else:
-            carb.log_info(f"Invalid prim at path: {prim_path}")
-    else:
-        carb.log_info(f"No scaling needed for object: {prim_path}")
\ No newline at end of file
+    min_coords, max_coords = get_bbox_service(stage).compute_world_bound(prim_path)
+    return min_coords, max_coords
@@ -21,8 +21,10 @@ import omni.kit.commands
 from omni.kit.window.popup_dialog.form_dialog import FormDialog
 from .utils import CreateCubeFromCurve
 from .style import gen_ai_style, guide
-from .chatgpt_apiconnect import call_Generate
+from .chatgpt_apiconnect import call_Generate, call_Generate_all
 from .priminfo import PrimInfo
+from .deep_search import clear_search_cache, refresh_local_index
+from .item_generator import get_stage_area_layers, use_area_layers
 from pxr import Sdf
 from .widgets import ProgressBar
 
@@ -36,8 +38,10 @@ class GenAIWindow(ui.Window):
         self._area_name_model = ui.SimpleStringModel()
         self._use_deepsearch = ui.SimpleBoolModel()
         self._use_chatgpt = ui.SimpleBoolModel()
+        self._use_stream = ui.SimpleBoolModel()
         self._areas = []
         self.response_log = None
+        self._result_label = None
         self.current_index = -1
         self.current_area = None
         self._combo_changed_sub = None
@@ -73,9 +77,16 @@ class GenAIWindow(ui.Window):
         carb.log_info(values)
 
         settings = carb.settings.get_settings()
+        # Cached search results are only valid for the nucleus path and filters they were made with
+        if values["deepsearch_nucleus_path"] != settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/deepsearch_nucleus_path") \
+                or values["path_filter"] != settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/path_filter"):
+            clear_search_cache()
         settings.set_string("/persistent/exts/omni.example.airoomgenerator/APIKey", values["APIKey"])
         settings.set_string("/persistent/exts/omni.example.airoomgenerator/deepsearch_nucleus_path", values["deepsearch_nucleus_path"])
         settings.set_string("/persistent/exts/omni.example.airoomgenerator/path_filter", values["path_filter"])
+        settings.set_string("/persistent/exts/omni.example.airoomgenerator/local_asset_dir", values["local_asset_dir"])
+        # A new folder is indexed in the background
+        refresh_local_index()
 
         dialog.hide()
 
@@ -84,6 +95,7 @@ class GenAIWindow(ui.Window):
         apikey_value = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/APIKey")
         nucleus_path = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/deepsearch_nucleus_path")
         path_filter = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/path_filter")
+        local_asset_dir = settings.get_as_string("/persistent/exts/omni.example.airoomgenerator/local_asset_dir")
 
         if apikey_value == "":
             apikey_value = "Enter API Key Here"
@@ -95,7 +107,8 @@ class GenAIWindow(ui.Window):
         field_defs = [
             FormDialog.FieldDef("APIKey", "API Key: ", ui.StringField, apikey_value),
             FormDialog.FieldDef("deepsearch_nucleus_path", "Nucleus Path: ", ui.StringField, nucleus_path),
-            FormDialog.FieldDef("path_filter", "Path Filter: ", ui.StringField, path_filter)
+            FormDialog.FieldDef("path_filter", "Path Filter: ", ui.StringField, path_filter),
+            FormDialog.FieldDef("local_asset_dir", "Local Asset Folder: ", ui.StringField, local_asset_dir)
         ]        
 
         dialog = FormDialog(
@@ -113,11 +126,22 @@ class GenAIWindow(ui.Window):
             ui.CheckBox(model=self._use_chatgpt)
             ui.Label("Use Deepsearch: ", tooltip="ENTERPRISE USERS ONLY")
             ui.CheckBox(model=self._use_deepsearch)
+            ui.Label("Stream Results: ", tooltip="Place each object as soon as ChatGPT returns it")
+            ui.CheckBox(model=self._use_stream)
             ui.Spacer()
         with ui.HStack(height=0):
             ui.Spacer(width=ui.Percent(10))
-            ui.Button("Generate", height=40,  
+            ui.Button("Generate", height=40, tooltip="Generated items can not be undone, use the result buttons instead",
                         clicked_fn=lambda: self._generate())
+            ui.Button("Generate All", height=40, tooltip="Generate every area concurrently, this can not be undone",
+                        clicked_fn=lambda: self._generate_all())
+            ui.Spacer(width=ui.Percent(10))
+        with ui.HStack(height=0):
+            ui.Spacer(width=ui.Percent(10))
+            ui.Button("<", width=30, tooltip="Previous result", clicked_fn=lambda: self._select_result(-1))
+            self._result_label = ui.Label(self._describe_results(), alignment=ui.Alignment.CENTER)
+            ui.Button(">", width=30, tooltip="Next result", clicked_fn=lambda: self._select_result(1))
+            ui.Button("Discard", width=80, tooltip="Drop the current result", clicked_fn=lambda: self._discard_result())
             ui.Spacer(width=ui.Percent(10))
         self.progress = ProgressBar()
         with ui.CollapsableFrame("ChatGPT Response / Log", height=0, collapsed=True):
@@ -137,6 +161,8 @@ class GenAIWindow(ui.Window):
             carb.log_warn("No area name provided")
             return
         new_area_name = CreateCubeFromCurve(self.get_prim_path(), area_name)
+        if new_area_name is None:
+            return
         self._areas.append(new_area_name)
         self.current_index = len(self._areas) - 1
         index_value_model = self.combo_model.get_item_value_model()
@@ -159,13 +185,7 @@ class GenAIWindow(ui.Window):
         if not attr.IsValid():
             attr = prim.CreateAttribute('genai:prompt', Sdf.ValueTypeNames.String)
         attr.Set(self.get_prompt())
-        items_path = self.current_area + "/items"
-        ctx = omni.usd.get_context()
-        stage = ctx.get_stage()
-        if stage.GetPrimAtPath(items_path).IsValid():
-            omni.kit.commands.execute('DeletePrims',
-                paths=[items_path],
-                destructive=False)
+        self._new_result([self.current_area])
         # asyncio.ensure_future(self.progress.fill_bar(0,100))
         run_loop = asyncio.get_event_loop()
         run_loop.create_task(call_Generate(self.get_prim_info(), 
@@ -173,9 +193,68 @@ class GenAIWindow(ui.Window):
                             self._use_chatgpt.as_bool, 
                             self._use_deepsearch.as_bool,
                             self.response_log,
-                            self.progress
+                            self.progress,
+                            self._use_stream.as_bool
+                            ))
+
+    def _generate_all(self):
+        stage = omni.usd.get_context().get_stage()
+        areas = []
+        for area in self._areas:
+            prim = stage.GetPrimAtPath(area)
+            if not prim.IsValid():
+                carb.log_warn(f"Skipping missing area {area}")
+                continue
+            # Each area keeps the prompt it was last generated with
+            attr = prim.GetAttribute('genai:prompt')
+            if attr.IsValid() and attr.Get():
+                prompt = attr.Get()
+            else:
+                prompt = self.get_prompt()
+                prim.CreateAttribute('genai:prompt', Sdf.ValueTypeNames.String).Set(prompt)
+            areas.append((PrimInfo(prim, area), prompt))
+        if len(areas) == 0:
+            carb.log_warn("No areas to generate")
+            return
+        self._new_result([prim_info.area_name for prim_info, _ in areas])
+        run_loop = asyncio.get_event_loop()
+        run_loop.create_task(call_Generate_all(areas,
+                            self._use_chatgpt.as_bool,
+                            self._use_deepsearch.as_bool,
+                            self.response_log,
+                            self.progress,
+                            self._use_stream.as_bool
                             ))
 
+    def _new_result(self, areas):
+        # Each generation is written into a new result layer of the area, copied from the current one
+        if not use_area_layers():
+            return
+        area_layers = get_stage_area_layers()
+        for area in areas:
+            if area:
+                area_layers.new_candidate(area)
+        self._update_result_label()
+
+    def _select_result(self, offset: int):
+        if self.current_area:
+            get_stage_area_layers().select(self.current_area, offset)
+            self._update_result_label()
+
+    def _discard_result(self):
+        if self.current_area:
+            get_stage_area_layers().discard(self.current_area)
+            self._update_result_label()
+
+    def _describe_results(self) -> str:
+        if not self.current_area:
+            return ""
+        return get_stage_area_layers().describe(self.current_area)
+
+    def _update_result_label(self):
+        if self._result_label is not None:
+            self._result_label.text = self._describe_results()
+
     # Returns a PrimInfo object containing the Length, Width, Origin and Area Name 
     def get_prim_info(self) -> PrimInfo:
         prim = self.get_prim()
@@ -221,4 +300,6 @@ class GenAIWindow(ui.Window):
         self._prompt_model = None
         self._area_name_model = None
         self._use_deepsearch = None
-        self._use_chatgpt = None
\ No newline at end of file
+        self._use_chatgpt = None
+        self._use_stream = None
+        self._result_label = None
\ No newline at end of file
@@ -18,16 +18,22 @@ import carb
 import asyncio
 
 class deep_search():
-    async def query_items(queries, url: str, paths):
+    async def query_items(queries, url: str, paths, max_concurrency: int = 8, timeout: float = 10.0):
+        # Runs up to max_concurrency searches at once. Results are in the order of queries,
+        # a query that failed, timed out or found nothing gives None.
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
-        result = list(tuple())        
-        for query in queries:
-            query_result = await deep_search._query_first(query, url, paths)
+        async def query_one(query):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(deep_search._query_first(query, url, paths), timeout)
+                except asyncio.TimeoutError:
+                    carb.log_warn(f"Search for {query} timed out after {timeout} seconds")
+                except Exception as e:
+                    carb.log_warn(f"Search for {query} failed: {e}")
+                return None
 
-            if query_result is not None:
-                result.append(query_result)
-
-        return result
+        return list(await asyncio.gather(*[query_one(query) for query in queries]))
 
     async def _query_first(query: str, url: str, paths):
 
@@ -62,4 +68,3 @@ class deep_search():
         filtered_query = filtered_query + query
         
         return await NGSearchClient.get_instance().find2(query=filtered_query, url=url)
-        
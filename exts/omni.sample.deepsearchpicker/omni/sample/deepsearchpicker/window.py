@@ -28,9 +28,15 @@ class DeepSearchPickerWindow(ui.Window):
         # Models
         self.frame.set_build_fn(self._build_fn)
         self._index = 0
-        self._query_results = None
+        # Paths returned by the search, their uris are read a page at a time around the current candidate
+        self._results = []
+        self._pages = {}
+        self._page_size = 1
         self._selected_prim = None
         self._prim_path_model = ui.SimpleStringModel()
+        # Layers of the candidates around the current one, opened in the background so swapping is instant
+        self._prefetched = {}
+        self._prefetch_tasks = {}
 	
     def _build_fn(self):
         
@@ -52,29 +58,34 @@ class DeepSearchPickerWindow(ui.Window):
                           "/NVIDIA/Assets/Isaac/2022.2.1/Isaac/Robots/",
                           "/NVIDIA/Assets/Isaac/2022.1/NVIDIA/Assets/ArchVis/Residential/Furniture/"]
 
-            self._query_results = await deep_search.query_all(query, "omniverse://ov-simready/", paths=prop_paths)
+            query_results = await deep_search.query_all(query, "omniverse://ov-simready/", paths=prop_paths)
+            self._results = query_results.paths if query_results is not None else []
+            self._pages = {}
+            self._page_size = max(1, carb.settings.get_settings().get_as_int("/exts/omni.sample.deepsearchpicker/page_size"))
 
             self._prim_path_model.set_value(prim_path)
+            self._clear_prefetched()
+            self.prefetch_neighbours()
 
         def increment_prim_index():
-            if self._query_results is None:
+            if len(self._results) == 0:
                 return 
 
             self._index = self._index + 1
 
-            if self._index >= len(self._query_results.paths):
+            if self._index >= len(self._results):
                 self._index = 0
 
             self.replace_reference()
             
         def decrement_prim_index():
-            if self._query_results is None:
+            if len(self._results) == 0:
                 return
 
             self._index = self._index - 1
 
-            if self._index <= 0:
-                self._index = len(self._query_results.paths) - 1
+            if self._index < 0:
+                self._index = len(self._results) - 1
 
             self.replace_reference()
 
@@ -91,13 +102,70 @@ class DeepSearchPickerWindow(ui.Window):
                     ui.Button(">", width=200, clicked_fn=lambda: increment_prim_index())
                     ui.Spacer()
     
+    def get_asset_url(self, index: int) -> str:
+        page, offset = divmod(index, self._page_size)
+        if page not in self._pages:
+            start = page * self._page_size
+            self._pages[page] = [path.uri for path in self._results[start:start + self._page_size]]
+        return "omniverse://ov-simready" + self._pages[page][offset]
+
     def replace_reference(self):
-        references: Usd.references = self._selected_prim.GetReferences()
-        references.ClearReferences()
-        references.AddReference(
-                assetPath="omniverse://ov-simready" + self._query_results.paths[self._index].uri)
+        # The reference list is edited on the spec so clearing and adding the reference recompose the prim only
+        # once, the Usd API is not safe to call inside a change block
+        layer = self._selected_prim.GetStage().GetEditTarget().GetLayer()
+        spec = Sdf.CreatePrimInLayer(layer, self._selected_prim.GetPath())
+        with Sdf.ChangeBlock():
+            spec.referenceList.ClearEdits()
+            spec.referenceList.prependedItems = [Sdf.Reference(self.get_asset_url(self._index))]
 
         carb.log_info("Got it?")
+        self.prefetch_neighbours()
+
+    def prefetch_neighbours(self):
+        # Opens the layers of the next and previous candidates, the window size is a setting
+        if len(self._results) == 0:
+            return
+        count = len(self._results)
+        window = carb.settings.get_settings().get_as_int("/exts/omni.sample.deepsearchpicker/prefetch_window")
+        indices = {self._index}
+        for offset in range(1, window + 1):
+            indices.add((self._index + offset) % count)
+            indices.add((self._index - offset) % count)
+
+        # Only the pages the window touches stay read
+        pages = {index // self._page_size for index in indices}
+        for page in list(self._pages.keys()):
+            if page not in pages:
+                del self._pages[page]
+        wanted = {self.get_asset_url(index) for index in indices if index != self._index}
+
+        # Let go of layers that fell out of the window so they can be released
+        for url in list(self._prefetched.keys()):
+            if url not in wanted:
+                del self._prefetched[url]
+
+        run_loop = asyncio.get_event_loop()
+        for url in wanted:
+            if url not in self._prefetched and url not in self._prefetch_tasks:
+                self._prefetch_tasks[url] = run_loop.create_task(self._prefetch(url))
+
+    async def _prefetch(self, url: str):
+        try:
+            # Sdf layer loading is thread safe, keep it off the UI thread
+            layer = await asyncio.get_event_loop().run_in_executor(None, Sdf.Layer.FindOrOpen, url)
+            if layer is not None:
+                self._prefetched[url] = layer
+        except Exception as e:
+            carb.log_warn(f"Could not prefetch {url}: {e}")
+        finally:
+            self._prefetch_tasks.pop(url, None)
+
+    def _clear_prefetched(self):
+        for task in self._prefetch_tasks.values():
+            task.cancel()
+        self._prefetch_tasks = {}
+        self._prefetched = {}
 
     def destroy(self):
+        self._clear_prefetched()
         super().destroy()
\ No newline at end of file